@@ -0,0 +1,283 @@
+"""
+Benchmark harness for the refinement, extrapolation and projection hot paths.
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000
+    python regina.py bench --sizes 1000000 --only score
+
+Each benchmark runs on synthetic data with the Calibration_Dataset.csv schema.
+Results (best/median wall time and peak traced memory) are written as JSON
+and compared against a stored baseline; slowdowns beyond the tolerance are
+flagged and make the run exit non-zero.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+from benchmarks import synthetic_data
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+OUTPUT_DIR = "output/benchmarks"
+NOISE_FLOORS = {"seconds_min": 0.005, "peak_mem_mb": 1.0}  # absolute changes below these are never flagged
+VALIDATE_LIMIT = 10_000_000
+
+# Shared across one run_benchmarks() call: its scratch directory and fixtures built once in it
+_run_state = {}
+
+def _bench_prime_index():
+    from engine import prime_index
+
+    if "prime_index" not in _run_state:
+        _run_state["prime_index"] = prime_index.PrimeIndex(os.path.join(_run_state["dir"], "prime_index.bin"),
+                                                           limit=VALIDATE_LIMIT)
+    return _run_state["prime_index"]
+
+# === Benchmarks ===
+# Each setup function takes (n_rows, seed) and returns a zero-argument callable to time.
+
+def setup_score_candidate(n, seed):
+    from engine import scoring
+
+    df = synthetic_data.make_calibration(n, seed)
+    return lambda: df.apply(scoring.score_candidate, axis=1)
+
+def setup_score_frame(n, seed):
+    from engine import scoring
+
+    df = synthetic_data.make_calibration(n, seed)
+    return lambda: scoring.score_frame(df)
+
+def setup_extrapolate(n, seed):
+    from engine import extrapolation
+
+    anchors = synthetic_data.make_combined(100, seed)
+    return lambda: extrapolation.extrapolate_candidates(anchors, n_samples=n, rng=seed)
+
+def setup_validate(n, seed):
+    from engine import validation
+
+    index = _bench_prime_index()
+    candidates = synthetic_data.make_combined(n, seed)[["Candidate"]]
+    candidates["Candidate"] = np.random.default_rng(seed).integers(0, VALIDATE_LIMIT, n)
+    false_elites = candidates["Candidate"].sample(min(n, 20), random_state=seed)
+    return lambda: validation.validate_candidates(candidates, index, false_elites)
+
+def setup_train_model(n, seed):
+    from engine import model
+
+    df = synthetic_data.make_combined(n, seed)
+    return lambda: model.train_boundary_model(df)
+
+def setup_apply_model(n, seed):
+    from engine import model
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        boundary_model = model.train_boundary_model(synthetic_data.make_combined(min(n, 10_000), seed))
+    df = synthetic_data.make_combined(n, seed + 1)
+    return lambda: model.apply_boundary_model(df, boundary_model)
+
+def setup_pca(n, seed):
+    from engine import projection
+
+    X = synthetic_data.make_calibration(n, seed)[projection_features()]
+    settings = projection.PROJECTION_SETTINGS
+    return lambda: projection.fit_projection_models(X, settings, use_umap=False)
+
+def setup_umap(n, seed):
+    import umap
+    from sklearn.preprocessing import StandardScaler
+    from engine import projection
+
+    X = StandardScaler().fit_transform(synthetic_data.make_calibration(n, seed)[projection_features()])
+    settings = projection.PROJECTION_SETTINGS
+    return lambda: umap.UMAP(
+        n_neighbors=settings["umap_n_neighbors"], min_dist=settings["umap_min_dist"],
+        metric=settings["umap_metric"], random_state=settings["random_state"],
+    ).fit_transform(X)
+
+@contextlib.contextmanager
+def _working_dir(path):
+    # The score log and evolution state live at paths relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+def setup_score_evolution(n, seed):
+    from engine import score_evolution, score_log
+
+    # A delta log of about n rows, written through score_log in its own scratch directory
+    work_dir = tempfile.mkdtemp(prefix="score_evolution_", dir=_run_state["dir"])
+    frames = synthetic_data.make_score_cycles(n, seed=seed)
+    with _working_dir(work_dir):
+        for cycle, (previous, current) in enumerate(zip(frames, frames[1:])):
+            score_log.append_cycle(previous, current, timestamp=f"cycle-{cycle}")
+
+    def run():
+        # What `evolve` does without a usable checkpoint: replay every cycle, fold and save the state
+        with _working_dir(work_dir):
+            return score_evolution.summarize(score_evolution.update_state(rebuild=True))
+    return run
+
+def projection_features():
+    return ["MotifSum", "Entropy", "HilbertMag", "CompositeScore", "EnhancedCompositeScore",
+            "RhythmicCompositeScore", "BoundaryTransitionIndex"]
+
+# name -> (setup, max rows run by default, required optional module)
+BENCHMARKS = {
+    "scoring.score_candidate": (setup_score_candidate, 100_000, None),
+    "scoring.score_frame": (setup_score_frame, None, None),
+    "extrapolation.extrapolate_candidates": (setup_extrapolate, None, None),
+    "validation.validate_candidates": (setup_validate, None, None),
+    "model.train_boundary_model": (setup_train_model, 1_000_000, None),
+    "model.apply_boundary_model": (setup_apply_model, None, None),
+    "projection.pca": (setup_pca, None, None),
+    "projection.umap": (setup_umap, 100_000, "umap"),
+    "score_evolution.update_state": (setup_score_evolution, None, None),
+}
+
+# === Measurement ===
+
+def measure(fn, repeat):
+    # One untimed warm-up run (JIT compilation, lazy imports, caches), timed runs without
+    # tracing, then one extra traced run for peak memory (tracing skews timings)
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "seconds_min": min(times),
+        "seconds_median": statistics.median(times),
+        "peak_mem_mb": peak / 2**20,
+        "repeat": repeat,
+    }
+
+def run_benchmarks(sizes, repeat=3, only=None, no_limits=False, seed=0):
+    import importlib.util
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="regina_bench_") as scratch_dir:
+        _run_state["dir"] = scratch_dir
+        try:
+            for name, (setup, max_rows, requires) in BENCHMARKS.items():
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                if requires and importlib.util.find_spec(requires) is None:
+                    print(f"⏭️ {name}: skipped ({requires} not installed)")
+                    continue
+                for n in sizes:
+                    if max_rows and n > max_rows and not no_limits:
+                        print(f"⏭️ {name} @ {n:,}: skipped (above default limit {max_rows:,}; use --no-limits)")
+                        continue
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        fn = setup(n, seed)
+                    stats = measure(fn, repeat)
+                    results.append({"name": name, "rows": n, **stats})
+                    print(f"⏱️ {name} @ {n:,}: {stats['seconds_min']:.4f}s best, "
+                          f"{stats['seconds_median']:.4f}s median, {stats['peak_mem_mb']:.1f} MB peak")
+        finally:
+            _run_state.clear()  # drops the memory-mapped fixtures before the directory is removed
+    return results
+
+def environment_info():
+    import pandas as pd
+
+    info = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+    with contextlib.suppress(ImportError):
+        import sklearn
+        info["sklearn"] = sklearn.__version__
+    return info
+
+# === Baseline comparison ===
+
+def compare(results, baseline, tolerance):
+    """
+    Return a list of regression messages for results slower (or hungrier) than
+    baseline by more than tolerance (0.25 = 25%).
+    """
+    reference = {(r["name"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        base = reference.get((r["name"], r["rows"]))
+        if base is None:
+            continue
+        for metric, noise_floor in NOISE_FLOORS.items():
+            if r[metric] > base[metric] * (1 + tolerance) and r[metric] - base[metric] > noise_floor:
+                regressions.append(
+                    f"{r['name']} @ {r['rows']:,}: {metric} {base[metric]:.4f} -> {r[metric]:.4f} "
+                    f"(+{(r[metric] / base[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Regina Field Toolkit hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="row counts to benchmark (10^3-10^7)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument("--only", nargs="+", help="run benchmarks whose name contains any of these substrings")
+    parser.add_argument("--no-limits", action="store_true", help="ignore per-benchmark default row limits")
+    parser.add_argument("--output", default=None, help="results JSON path (default: output/benchmarks/bench_<timestamp>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.only, args.no_limits)
+    report = {"environment": environment_info(), "results": results}
+
+    output = args.output or os.path.join(OUTPUT_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"📝 Benchmark results saved: {output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
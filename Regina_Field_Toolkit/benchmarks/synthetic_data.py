@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# Marginal distributions follow data/init/Calibration_Dataset.csv (means/stds/ranges)
+FIELD_STATES = ["High", "Mid", "Low"]
+INFERRED_STATES = ["Low", "Unknown", "High"]
+
+def make_calibration(n, seed=0):
+    """
+    Synthetic frame with the Calibration_Dataset.csv schema and roughly matching marginals.
+    """
+    rng = np.random.default_rng(seed)
+    motif = np.clip(rng.normal(25.7, 11.7, n).round(), 6, 78).astype(np.int64)
+    return pd.DataFrame({
+        "Number": rng.choice(np.arange(200_000, 200_000 + max(4 * n, 400_000)), size=n, replace=False),
+        "FieldState": rng.choice(FIELD_STATES, n),
+        "MotifSum": motif,
+        "Entropy": np.clip(rng.normal(0.38, 0.235, n), 0.0, 0.905),
+        "HilbertMag": np.clip(rng.normal(17.6, 8.2, n).round(1), 4.0, 58.0),
+        "CompositeScore": rng.normal(0.611, 0.032, n),
+        "EnhancedCompositeScore": rng.normal(0.795, 0.013, n),
+        "RhythmicCompositeScore": rng.normal(0.828, 0.010, n),
+        "UnionPrediction": np.ones(n, dtype=np.int64),
+        "InferredFieldState": rng.choice(INFERRED_STATES, n, p=[0.57, 0.425, 0.005]),
+        "UMAP_X": rng.normal(3.8, 2.8, n),
+        "UMAP_Y": rng.normal(4.5, 2.4, n),
+        "PrimeStatus": "True Prime",
+        "PrimeType": "General",
+        "Type": np.nan,
+        "BoundaryTransitionIndex": rng.normal(0.0, 1.0, n),
+        "TransitionFlag": False,
+    })
+
+def make_combined(n, seed=0, prime_fraction=0.7):
+    """
+    Synthetic combined_with_boundary-style frame: calibration features plus
+    Candidate, Score, IsPrime and BoundaryScore.
+    """
+    from engine import scoring
+
+    rng = np.random.default_rng(seed + 1)
+    df = make_calibration(n, seed).rename(columns={"Number": "Candidate"})
+    df["IsPrime"] = (rng.random(n) < prime_fraction).astype(np.int64)
+    df["Score"] = scoring.score_frame(df)
+    df["BoundaryScore"] = rng.random(n)
+    return df
+
+def make_score_cycles(n_rows, n_candidates=None, seed=0):
+    """
+    Synthetic per-cycle score tables (Candidate, Score, BoundaryScore) for
+    n_candidates candidates over enough cycles to reach n_rows tracked rows.
+    Every score moves a little each cycle, as with warm-started boundary models,
+    so nearly every row ends up in the delta log.
+    """
+    rng = np.random.default_rng(seed + 2)
+    n_candidates = n_candidates or max(1, n_rows // 20)
+    candidates = rng.choice(np.arange(200_000, 200_000 + 4 * n_candidates), size=n_candidates, replace=False)
+    score = rng.normal(12.0, 4.0, n_candidates)
+    boundary = rng.random(n_candidates)
+    frames = []
+    for _ in range(-(-n_rows // n_candidates)):
+        frames.append(pd.DataFrame({"Candidate": candidates, "Score": score, "BoundaryScore": boundary}))
+        score = score + rng.normal(0.0, 0.05, n_candidates)
+        boundary = np.clip(boundary + rng.normal(0.0, 0.02, n_candidates), 0.0, 1.0)
+    return frames
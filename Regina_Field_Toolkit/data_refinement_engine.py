@@ -1,49 +1,53 @@
-from engine import io_utils, scoring, extrapolation, ranking, validation, model
+from engine import io_utils, scoring, extrapolation, ranking, validation, model, prime_index, novelty, instrumentation
+from engine.instrumentation import stage
 import pandas as pd
 
+instrumentation.start_run("refine")
+
 # === Load Data ===
-init_known = io_utils.load_csv("data/init/known_primes_up_to_10_million.csv")
-init_false = io_utils.load_csv("data/init/false_elites.csv")
-calibration = io_utils.load_csv("data/init/Calibration_Dataset.csv")
+with stage("load") as s:
+    known_primes = prime_index.load_prime_index()
+    init_false = io_utils.load_csv("data/init/false_elites.csv")
+    calibration = io_utils.load_csv("data/init/Calibration_Dataset.csv")
+    s.rows = len(calibration)
 
-# === Score Known Primes ===
-calibration_indexed = calibration.set_index("Number")
-known_candidates = init_known["Candidate"]
-scored_known = []
+# === Join Label Sets onto Calibration ===
+# A Number that appears more than once would fan out every join below; keep its first row
+duplicated = calibration["Number"].duplicated(keep="first")
+if duplicated.any():
+    print(f"⚠️ {int(duplicated.sum())} duplicate Number rows in calibration data; keeping the first row for each.")
+calibration_indexed = calibration[~duplicated].set_index("Number")
 
-for n in known_candidates:
-    if n in calibration_indexed.index:
-        row = calibration_indexed.loc[n]
-        score = scoring.score_candidate(row)
-        entry = row.to_dict()
-        entry.update({"Candidate": n, "Score": score, "IsPrime": 1})
-        scored_known.append(entry)
+def label_from_calibration(candidates, is_prime):
+    """
+    Inner-join candidate numbers (deduplicated, in first-seen order) onto the
+    calibration rows. Columns match the calibration table with Number replaced
+    by Candidate, plus the IsPrime label.
+    """
+    keys = pd.Index(pd.unique(pd.Series(candidates)), name="Number")
+    entries = pd.DataFrame(index=keys).join(calibration_indexed, how="inner")
+    entries["Candidate"] = entries.index.to_numpy()
+    entries["IsPrime"] = is_prime
+    return entries.reset_index(drop=True)
 
-scored_known_df = pd.DataFrame(scored_known)
+def score_and_save(labeled, label, out_path):
+    if labeled.empty:
+        print(f"⚠️ Warning: No scored {label} found. Check dataset alignment.")
+        return labeled
+    with stage("score", rows=len(labeled)):
+        labeled["Score"] = scoring.score_frame(labeled)
+    with stage("save", rows=len(labeled)):
+        io_utils.save_table(labeled, out_path)
+    return labeled
 
-if scored_known_df.empty:
-    print("⚠️ Warning: No scored known primes found. Check dataset alignment.")
-else:
-    io_utils.save_csv(scored_known_df, "output/refinement/scored_primes.csv")
+# === Score Known Primes ===
+calibration_numbers = calibration_indexed.index.to_series().sort_values()
+with stage("validation", rows=len(calibration_numbers)):
+    known_candidates = calibration_numbers[known_primes.contains(calibration_numbers.to_numpy())]
+scored_known_df = score_and_save(label_from_calibration(known_candidates, 1), "known primes", "output/refinement/scored_primes.csv")
 
 # === Score False Elites ===
-false_candidates = init_false["Candidate"]
-scored_false = []
-
-for n in false_candidates:
-    if n in calibration_indexed.index:
-        row = calibration_indexed.loc[n]
-        score = scoring.score_candidate(row)
-        entry = row.to_dict()
-        entry.update({"Candidate": n, "Score": score, "IsPrime": 0})
-        scored_false.append(entry)
-
-scored_false_df = pd.DataFrame(scored_false)
-
-if scored_false_df.empty:
-    print("⚠️ Warning: No scored false elites found. Check dataset alignment.")
-else:
-    io_utils.save_csv(scored_false_df, "output/refinement/scored_false_elites.csv")
+scored_false_df = score_and_save(label_from_calibration(init_false["Candidate"], 0), "false elites", "output/refinement/scored_false_elites.csv")
 
 # === Combine and Train Boundary Model ===
 combined = pd.concat([scored_known_df, scored_false_df], ignore_index=True)
@@ -56,8 +60,17 @@ if len(label_counts) < 2:
     raise ValueError("❌ Boundary model training failed: dataset must contain both prime (1) and non-prime (0) classes.")
 
 # === Train and Apply Boundary Model ===
-boundary_model = model.train_boundary_model(combined)
-combined_scored = model.apply_boundary_model(combined, boundary_model)
-io_utils.save_csv(combined_scored, "output/refinement/combined_with_boundary.csv")
+with stage("train", rows=len(combined)):
+    boundary_model = model.train_boundary_model(combined)
+boundary_cache = model.BoundaryScoreCache(model.model_version(boundary_model))
+with stage("apply", rows=len(combined)):
+    combined_scored = model.apply_boundary_model(combined, boundary_model, boundary_cache)
+    combined_scored[model.VERSION_COL] = model.model_version(boundary_model)  # lets warm starts trust these scores
+with stage("save", rows=len(combined_scored)):
+    model.save_boundary_model(boundary_model)
+    boundary_cache.save()
+    io_utils.save_table(combined_scored, "output/refinement/combined_with_boundary.csv")
+    # The dataset was regenerated, so the novelty index starts over from it
+    novelty.save_novelty_index(novelty.NoveltyIndex.build(combined_scored))
 
 print("✅ Scoring and model training complete. Boundary scores saved.")
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from engine import io_utils
+
+YIELD_PATH = "output/refinement/anchor_yield.csv"
+DECAY = 0.9  # weight kept by earlier cycles' counts, so the record follows the moving score landscape
+PRIOR = (1.0, 1.0)  # Beta(accepted + a, rejected + b); unseen anchors start at an even acceptance rate
+
+class AnchorScheduler:
+    """
+    Per-anchor yield record (draws and accepted candidates) with Thompson-sampling
+    weights: each cycle draws an acceptance rate for every anchor from its Beta
+    posterior and samples anchors in proportion to it. Productive anchors get more
+    draws, while rarely tried ones keep enough posterior spread to be explored.
+    """
+
+    def __init__(self, record=None):
+        self.record = record if record is not None else pd.DataFrame(
+            {"Draws": pd.Series(dtype=np.float64), "Accepted": pd.Series(dtype=np.float64)},
+            index=pd.Index([], name="Anchor", dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path=YIELD_PATH):
+        if not io_utils.table_exists(path):
+            return cls()
+        return cls(io_utils.load_table(path).set_index("Anchor"))
+
+    def save(self, path=YIELD_PATH):
+        io_utils.save_table(self.record.reset_index(), path)
+
+    def weights(self, anchors_df, rng=None):
+        # Sampling probabilities aligned with anchors_df rows
+        rng = np.random.default_rng(rng)
+        stats = self.record.reindex(anchors_df["Candidate"].to_numpy()).fillna(0.0)
+        accepted = stats["Accepted"].to_numpy()
+        rejected = np.maximum(stats["Draws"].to_numpy() - accepted, 0.0)
+        theta = rng.beta(accepted + PRIOR[0], rejected + PRIOR[1])
+        return theta / theta.sum()
+
+    def update(self, draws, accepted):
+        """
+        Fold one cycle into the record. draws and accepted are Series of counts
+        indexed by anchor Candidate ID; earlier counts are discounted by DECAY.
+        """
+        index = self.record.index.union(draws.index).union(accepted.index)
+        record = self.record.reindex(index).fillna(0.0) * DECAY
+        record["Draws"] += draws.reindex(index).fillna(0).to_numpy()
+        record["Accepted"] += accepted.reindex(index).fillna(0).to_numpy()
+        self.record = record.rename_axis("Anchor")
+
+    def update_from_batch(self, generated, accepted):
+        # Convenience for one extrapolate -> filter pass; both frames carry the "Anchor" column
+        self.update(generated["Anchor"].value_counts(), accepted["Anchor"].value_counts())
+
@@ -0,0 +1,121 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+FIGSIZE = (8, 6)
+
+def _pyplot():
+    # The Agg backend is selected when rendering starts, not when the module is imported
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+def group_history(df, x_col, y_col, color_col="Score"):
+    """
+    Split the projection history into per-cycle frames once: returns a list of
+    (cycle, xy array, color array) in cycle order.
+    """
+    xy = df[[x_col, y_col]].to_numpy(dtype=np.float64)
+    colors = df[color_col].to_numpy(dtype=np.float64)
+    return [(cycle, xy[pos], colors[pos]) for cycle, pos in sorted(df.groupby("Cycle", sort=False).indices.items())]
+
+def _frame_figure(limits, color_range, label):
+    # Static parts (axes, ticks, labels) are drawn once; the scatter and title are redrawn per frame
+    from matplotlib.colors import Normalize
+
+    fig, ax = _pyplot().subplots(figsize=FIGSIZE)
+    scatter = ax.scatter(np.empty(0), np.empty(0), c=np.empty(0), cmap="viridis", norm=Normalize(*color_range), s=30,
+                         animated=True)
+    title = ax.set_title(f"{label} - Cycle", animated=True)
+    ax.set_xlim(*limits[0])
+    ax.set_ylim(*limits[1])
+    fig.canvas.draw()
+    return fig, scatter, title, fig.canvas.copy_from_bbox(fig.bbox)
+
+def render_frames(frames, limits, color_range, label, out_dir=None, start=0):
+    """
+    Render frames with one figure and one scatter artist whose offsets and colors
+    are swapped per frame, blitted over a background drawn once. Frames are
+    returned as images, or written as numbered PNGs into out_dir (returning
+    their paths) when out_dir is given.
+    """
+    from PIL import Image
+
+    fig, scatter, title, background = _frame_figure(limits, color_range, label)
+    size = fig.canvas.get_width_height()
+    rendered = []
+    for i, (cycle, xy, colors) in enumerate(frames):
+        fig.canvas.restore_region(background)
+        scatter.set_offsets(xy)
+        scatter.set_array(colors)
+        title.set_text(f"{label} - Cycle {cycle}")
+        fig.draw_artist(scatter)
+        fig.draw_artist(title)
+        image = Image.frombuffer("RGBA", size, bytes(fig.canvas.buffer_rgba()))
+        if out_dir is None:
+            rendered.append(image)
+        else:
+            path = os.path.join(out_dir, f"frame_{start + i:06d}.png")
+            image.save(path)
+            rendered.append(path)
+    _pyplot().close(fig)
+    return rendered
+
+def _load_frame(path):
+    from PIL import Image
+
+    image = Image.open(path)
+    image.load()  # reads the pixels and releases the file handle
+    return image
+
+def animate_projection(df, x_col, y_col, label, out_gif, fps=1, workers=1):
+    """
+    Write a GIF with one frame per cycle. With workers > 1 the frames are split
+    into contiguous ranges rendered by separate processes, then assembled in order.
+    """
+    from PIL import Image
+
+    frames = group_history(df, x_col, y_col)
+    if not frames:
+        print(f"⚠️ No cycles to animate for {label}.")
+        return
+    limits = ((df[x_col].min() - 1, df[x_col].max() + 1), (df[y_col].min() - 1, df[y_col].max() + 1))
+    color_range = (df["Score"].min(), df["Score"].max())
+
+    with tempfile.TemporaryDirectory() as frame_dir:
+        if workers > 1 and len(frames) > workers:
+            bounds = np.linspace(0, len(frames), workers + 1).astype(int)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = [pool.submit(render_frames, frames[lo:hi], limits, color_range, label, frame_dir, lo)
+                        for lo, hi in zip(bounds[:-1], bounds[1:])]
+                paths = [path for job in jobs for path in job.result()]
+            images = [_load_frame(path) for path in paths]
+        else:
+            images = render_frames(frames, limits, color_range, label)
+        images[0].save(out_gif, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+    print(f"🎥 Animation saved: {out_gif} ({len(frames)} frames)")
+
+def plot_trails(df, x_col, y_col, label, out_file):
+    # All candidate trails as one LineCollection and all end points as one scatter
+    from matplotlib.collections import LineCollection
+
+    plt = _pyplot()
+    ordered = df.sort_values("Cycle", kind="stable")
+    xy = ordered[[x_col, y_col]].to_numpy(dtype=np.float64)
+    trails = [xy[pos] for pos in ordered.groupby("Candidate", sort=False).indices.values()]
+    palette = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+
+    fig, ax = plt.subplots(figsize=FIGSIZE)
+    ax.add_collection(LineCollection(trails, colors=[palette[i % len(palette)] for i in range(len(trails))], alpha=0.5))
+    ends = np.array([trail[-1] for trail in trails]).reshape(-1, 2)
+    ax.scatter(ends[:, 0], ends[:, 1], c="red", s=10)
+    ax.autoscale_view()
+    ax.set_title(f"{label} (Progression Trails)")
+    fig.tight_layout()
+    fig.savefig(out_file)
+    plt.close(fig)
+    print(f"🛤️ Trail plot saved: {out_file}")
@@ -0,0 +1,110 @@
+import pandas as pd
+from engine import io_utils, model, novelty, score_log
+from engine.instrumentation import stage
+
+COMBINED_PATH = "output/refinement/combined_with_boundary.csv"
+NEW_CANDIDATES_PATH = "output/refinement/newly_integrated_candidates.csv"
+
+def update_model(combined, combined_updated, full_retrain=False, boundary_model=None, persist=True):
+    """
+    Refresh BoundaryScore for combined_updated, whose first len(combined) rows are
+    the previous dataset. Warm-starts boundary_model (by default the saved forest)
+    unless a full retrain is requested (or no usable model exists). A warm start
+    whose new rows and replay sample hold a single class falls back to a full
+    retrain. Existing scores are only updated incrementally when combined is
+    stamped (model.VERSION_COL) with the version of the model being warm-started;
+    otherwise every row is rescored. combined_updated is stamped with the
+    resulting model. With persist, the resulting model is saved. Returns
+    (combined_updated, boundary model).
+    """
+    if full_retrain:
+        boundary_model = None
+    elif boundary_model is None:
+        boundary_model = model.load_boundary_model()
+    warm_start = boundary_model is not None and len(boundary_model.estimators_) < model.MAX_TREES
+    if warm_start:
+        n_prev_trees = len(boundary_model.estimators_)
+        # The dataset and model are separate writes; only fold new trees into scores from this exact forest
+        incremental = model.scored_by(combined, boundary_model)
+        new_mask = combined_updated.index >= len(combined)
+        with stage("train", rows=int(new_mask.sum())) as s:
+            try:
+                boundary_model = model.update_boundary_model(boundary_model, combined_updated, new_mask)
+                s.meta["mode"] = "warm_start"
+            except ValueError as e:
+                print(f"⚠️ Warm start skipped ({str(e).removeprefix('❌ ')}) Falling back to a full retrain.")
+                s.meta["mode"] = "warm_start_skipped"
+                warm_start = False
+        if warm_start:
+            with stage("apply", rows=len(combined_updated)) as s:
+                if incremental:
+                    combined_updated = model.apply_boundary_model_incremental(combined_updated, boundary_model, n_prev_trees)
+                else:
+                    print("⚠️ Stored boundary scores were not computed by the saved model. Rescoring every row.")
+                    combined_updated = model.apply_boundary_model(combined_updated, boundary_model)
+                    s.meta["mode"] = "rescore"
+    if not warm_start:
+        with stage("train", rows=len(combined_updated)) as s:
+            boundary_model = model.train_boundary_model(combined_updated)
+            s.meta["mode"] = "full"
+        with stage("apply", rows=len(combined_updated)):
+            combined_updated = model.apply_boundary_model(combined_updated, boundary_model)
+    combined_updated[model.VERSION_COL] = model.model_version(boundary_model)
+    if persist:
+        with stage("save"):
+            model.save_boundary_model(boundary_model)
+    return combined_updated, boundary_model
+
+def track_scores(combined, combined_updated, tolerance=score_log.TOLERANCE):
+    # Only new candidates and scores that moved more than tolerance are appended (see engine/score_log.py)
+    try:
+        with stage("save", rows=len(combined_updated)) as s:
+            cycle_id, changed = score_log.append_cycle(combined, combined_updated, tolerance)
+            s.meta["changed"] = changed
+        print(f"📊 Score evolution logged: cycle {cycle_id}, {changed} of {len(combined_updated)} candidates changed.")
+    except Exception as e:
+        print(f"⚠️ Score tracking failed: {e}")
+
+def integrate_candidates(combined, labeled, full_retrain=False, combined_path=COMBINED_PATH,
+                         novelty_index=None, boundary_model=None, persist=True):
+    """
+    Add labeled candidates that are not in combined yet, update the boundary model,
+    save the dataset and log score evolution. Integrated rows are also added to
+    novelty_index (when given), which is saved alongside the dataset.
+
+    boundary_model is the model to warm-start (default: the saved one). With
+    persist=False the dataset, model and novelty index stay in memory only (the
+    caller checkpoints them); the new-candidate table and tracking log are still
+    written. Returns (updated dataset, boundary model); the dataset is combined
+    itself when nothing new was found.
+    """
+    existing_ids = set(combined["Candidate"])
+    new_valid = labeled[~labeled["Candidate"].isin(existing_ids)]
+    # A batch can draw the same integer twice; keep its highest-scoring row, as run_parallel_chains does
+    new_valid = new_valid.sort_values("Score", ascending=False, kind="stable").drop_duplicates(subset="Candidate")
+
+    if new_valid.empty:
+        print("🔁 No new candidates passed filtering. No retraining necessary.")
+        return combined, boundary_model
+
+    print(f"🧬 {len(new_valid)} new extrapolated candidates identified. Updating model...")
+    # Tables written before anchors were dropped at labeling may still carry the column
+    combined_updated = pd.concat([combined, new_valid], ignore_index=True).drop(columns="Anchor", errors="ignore")
+    combined_updated, boundary_model = update_model(combined, combined_updated, full_retrain=full_retrain,
+                                                    boundary_model=boundary_model, persist=persist)
+    if novelty_index is not None:
+        novelty_index.add(new_valid)
+
+    # Save full updated dataset
+    with stage("save", rows=len(combined_updated)):
+        if persist:
+            io_utils.save_table(combined_updated, combined_path)
+            if novelty_index is not None:
+                novelty.save_novelty_index(novelty_index)
+        io_utils.save_table(new_valid, NEW_CANDIDATES_PATH)
+
+    # === Score Tracking ===
+    track_scores(combined, combined_updated)
+
+    print("✅ Enrichment cycle complete. Boundary model updated.")
+    return combined_updated, boundary_model
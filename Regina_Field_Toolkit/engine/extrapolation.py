@@ -1,31 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
 import pandas as pd
-from engine import scoring, validation
+from engine import features, prime_index, scoring, validation
+
+OFFSET_RANGE = (-100, 100)  # candidate = anchor + integer offset drawn from [low, high)
+CANDIDATE_COLUMNS = ["Candidate"] + scoring.FEATURE_COLS + ["Anchor"]
+
+def _empty_counts():
+    # Per-anchor counts when nothing was drawn (same shape as value_counts() on "Anchor")
+    return pd.Series(dtype=np.int64, index=pd.Index([], dtype=np.int64, name="Anchor"), name="count")
 
 def select_elite_anchors(df, score_col="Score", boundary_col="BoundaryScore", top_n=100):
-    # Select top N elite primes based on score and boundary convergence
+    # Select top N elite primes based on score and boundary convergence (heap-based top-k, no full sort)
     df_elite = df[df["IsPrime"] == 1]
-    df_elite = df_elite.sort_values(by=[score_col, boundary_col], ascending=False)
-    return df_elite.head(top_n)
+    return df_elite.nlargest(top_n, [score_col, boundary_col])
+
+def _noise_scales(noise_scale):
+    # Scalar, sequence in scoring.FEATURE_COLS order, or dict keyed by feature (missing keys default to 1.0)
+    if isinstance(noise_scale, dict):
+        return np.array([noise_scale.get(col, 1.0) for col in scoring.FEATURE_COLS], dtype=np.float64)
+    return np.broadcast_to(np.asarray(noise_scale, dtype=np.float64), (len(scoring.FEATURE_COLS),))
+
+def _draw_candidates(anchor_ids, anchor_features, n_samples, rng, scales, offset_range, anchor_weights=None):
+    if anchor_weights is None:
+        picks = rng.integers(0, len(anchor_ids), size=n_samples)
+    else:
+        picks = rng.choice(len(anchor_ids), size=n_samples, p=anchor_weights)
+    features = anchor_features[picks] + rng.normal(0.0, 1.0, size=(n_samples, anchor_features.shape[1])) * scales
+    candidates = anchor_ids[picks] + rng.integers(offset_range[0], offset_range[1], size=n_samples)
+
+    block = pd.DataFrame(features, columns=scoring.FEATURE_COLS)
+    block.insert(0, "Candidate", candidates)
+    block["Anchor"] = anchor_ids[picks]
+    return block
 
-def extrapolate_candidates(anchors_df, n_samples=200):
-    # Generate new candidate numbers by perturbing elite anchors
-    candidates = []
-    feature_cols = ["MotifSum", "Entropy", "HilbertMag", "BoundaryTransitionIndex"]
+def iter_extrapolated_candidates(anchors_df, n_samples, chunk_size=1_000_000, rng=None, noise_scale=1.0, offset_range=OFFSET_RANGE,
+                                 anchor_weights=None):
+    """
+    Generate candidates by perturbing elite anchors, yielding DataFrame blocks of
+    at most chunk_size rows so very large runs never materialize in memory at once.
 
-    for _ in range(n_samples):
-        base = anchors_df.sample(1).iloc[0]
-        perturbed = {col: base[col] + np.random.normal(0, 1) for col in feature_cols}
-        candidate_val = int(base["Candidate"] + np.random.randint(-100, 100))
-        row = {"Candidate": candidate_val, **perturbed}
-        candidates.append(row)
+    rng may be a numpy Generator, a seed or SeedSequence, or None for fresh entropy.
+    noise_scale sets the Gaussian standard deviation per feature. anchor_weights
+    (aligned with anchors_df rows, summing to 1) replaces uniform anchor picks.
+    Each row records the Candidate ID of the anchor it came from in "Anchor".
+    """
+    rng = np.random.default_rng(rng)
+    scales = _noise_scales(noise_scale)
+    anchor_ids = anchors_df["Candidate"].to_numpy(dtype=np.int64)
+    anchor_features = anchors_df[scoring.FEATURE_COLS].to_numpy(dtype=np.float64)
 
-    return pd.DataFrame(candidates)
+    for start in range(0, n_samples, chunk_size):
+        yield _draw_candidates(anchor_ids, anchor_features, min(chunk_size, n_samples - start), rng, scales, offset_range,
+                               anchor_weights)
+
+def extrapolate_candidates(anchors_df, n_samples=200, rng=None, noise_scale=1.0, offset_range=OFFSET_RANGE, anchor_weights=None):
+    # Generate new candidate numbers by perturbing elite anchors (one batched draw)
+    blocks = list(iter_extrapolated_candidates(anchors_df, n_samples, max(n_samples, 1), rng, noise_scale, offset_range,
+                                               anchor_weights))
+    return pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=CANDIDATE_COLUMNS)
 
 def score_and_filter_candidates(candidates_df):
     # Score and filter candidates using existing scoring logic
-    candidates_df["Score"] = candidates_df.apply(scoring.score_candidate, axis=1)
+    candidates_df["Score"] = scoring.score_frame(candidates_df)
     return candidates_df[candidates_df["Score"] > 0.75].copy()  # Example threshold
 
-def label_candidates(scored_df, known_primes_df, false_elites_df):
-    return validation.validate_candidates(scored_df, known_primes_df["Candidate"], false_elites_df["Candidate"])
\ No newline at end of file
+def label_candidates(scored_df, known_primes, false_elites_df):
+    # known_primes is a PrimeIndex or a DataFrame with a "Candidate" column.
+    # "Anchor" only feeds the anchor scheduler and is not carried into labeled/persisted tables
+    if isinstance(known_primes, pd.DataFrame):
+        known_primes = known_primes["Candidate"]
+    scored_df = scored_df.drop(columns="Anchor", errors="ignore")
+    return validation.validate_candidates(scored_df, known_primes, false_elites_df["Candidate"])
+
+def run_chain(anchors_df, n_samples, seed, chunk_size=1_000_000, anchor_weights=None, real_features=False, feature_cache=None):
+    """
+    One independent extrapolate -> score chain with its own RNG stream; only accepted
+    rows are kept per block. With real_features, each block's perturbed features are
+    replaced by values computed from its integers before scoring; the prime index
+    is only mapped (never extended) here, so the caller must have sieved far enough.
+    feature_cache (this process's copy of a FeatureCache) fills candidates seen before.
+    Returns (accepted rows, number of draws per anchor, features computed here or None).
+    """
+    rng = np.random.default_rng(seed)
+    index = prime_index.load_prime_index(limit=0) if real_features else None
+    n_cached = len(feature_cache.table) if feature_cache is not None else 0
+    accepted, draws = [], []
+    for block in iter_extrapolated_candidates(anchors_df, n_samples, chunk_size, rng, anchor_weights=anchor_weights):
+        if real_features:
+            block = features.featurize(block, feature_cache, workers=1, index=index)  # the chain is already one worker process
+        draws.append(block["Anchor"].value_counts())
+        accepted.append(score_and_filter_candidates(block))
+    # FeatureCache.update appends, so everything past the inherited rows was computed in this chain
+    computed = feature_cache.table.iloc[n_cached:].reset_index() if real_features and feature_cache is not None else None
+    if not accepted:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS + ["Score"]), _empty_counts(), computed
+    return pd.concat(accepted, ignore_index=True), pd.concat(draws).groupby(level=0).sum(), computed
+
+def run_parallel_chains(anchors_df, n_chains, n_samples=300, seed=None, max_workers=None, anchor_weights=None,
+                        real_features=False, feature_cache=None):
+    """
+    Run n_chains independent extrapolation chains across a process pool, each
+    seeded from its own SeedSequence child, and merge their accepted candidates.
+    Duplicate Candidate IDs keep the highest-scoring row. With real_features and a
+    FeatureCache, every chain looks candidates up in it and the features the
+    chains computed are added to it here (the caller saves it). Returns (merged
+    rows, draws per anchor, accepted rows per anchor before deduplication).
+    """
+    if n_chains <= 0:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS + ["Score"]), _empty_counts(), _empty_counts()
+    seeds = np.random.SeedSequence(seed).spawn(n_chains)
+    if real_features:
+        # Sieve past the largest possible candidate here, so chain processes never extend the shared index
+        prime_index.load_prime_index(limit=int(anchors_df["Candidate"].max()) + OFFSET_RANGE[1] + features.GAP_MARGIN)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(run_chain, repeat(anchors_df), repeat(n_samples), seeds, repeat(1_000_000), repeat(anchor_weights),
+                                repeat(real_features), repeat(feature_cache)))
+
+    if real_features and feature_cache is not None:
+        for _, _, computed in results:
+            feature_cache.update(computed)
+    merged = pd.concat([accepted for accepted, _, _ in results], ignore_index=True)
+    draws = pd.concat([chain_draws for _, chain_draws, _ in results]).groupby(level=0).sum()
+    accepted_per_anchor = merged["Anchor"].value_counts()
+    merged = merged.sort_values("Score", ascending=False, kind="stable")
+    return merged.drop_duplicates(subset="Candidate").reset_index(drop=True), draws, accepted_per_anchor
@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from engine import io_utils, prime_index
+
+CACHE_PATH = "output/refinement/feature_cache.csv"
+FEATURE_VERSION = "gaps-v2"  # bump when a definition changes; older cache entries are dropped
+CHUNK_SIZE = 250_000
+GAP_MARGIN = 10_000  # sieve headroom past the largest candidate for the next prime
+
+# Features that follow from the integer. BoundaryTransitionIndex is a calibrated
+# composite with no integer definition yet, so candidates keep the value drawn
+# from their anchor.
+COMPUTED_COLS = ["MotifSum", "Entropy", "HilbertMag"]
+
+def analytic_envelope(signal):
+    """
+    Magnitude of the analytic signal along the last axis (FFT Hilbert transform:
+    negative frequencies zeroed, positive ones doubled).
+    """
+    n = signal.shape[-1]
+    h = np.zeros(n)
+    h[0] = 1.0
+    if n % 2 == 0:
+        h[n // 2] = 1.0
+        h[1:n // 2] = 2.0
+    else:
+        h[1:(n + 1) // 2] = 2.0
+    return np.abs(np.fft.ifft(np.fft.fft(signal, axis=-1) * h, axis=-1))
+
+def gap_features(numbers, index):
+    """
+    Regina Field features of each integer, from the prime gaps around it:
+
+    - MotifSum: g_prev + g_next, the gaps to the nearest primes below and above
+    - Entropy: |g_next - g_prev| / MotifSum
+    - HilbertMag: peak analytic-signal envelope of the gap pair (g_prev, g_next)
+
+    For calibration primes these match Calibration_Dataset.csv.
+    Integers below 3 (no prime beneath them) get NaN.
+    Returns a float64 array with columns in COMPUTED_COLS order.
+    """
+    n = np.asarray(numbers, dtype=np.int64)
+    below = index.previous_primes(n)
+    above = index.next_primes(n)
+
+    gaps = np.stack([n - below, above - n], axis=1).astype(np.float64)
+    motif = gaps.sum(axis=1)
+    entropy = np.abs(gaps[:, 1] - gaps[:, 0]) / motif
+    hilbert = analytic_envelope(gaps).max(axis=1)
+
+    X = np.stack([motif, entropy, hilbert], axis=1)
+    X[below == 0] = np.nan
+    return X
+
+def _features_chunk(numbers, index_path):
+    # Worker entry point: the parent has already sieved far enough, so this only maps the index
+    return gap_features(numbers, prime_index.load_prime_index(index_path, limit=0))
+
+def compute_features(numbers, workers=None, chunk_size=CHUNK_SIZE, index_path=prime_index.DEFAULT_INDEX_PATH, index=None):
+    """
+    Features for an array of integers, computed in chunks of chunk_size. With
+    more than one chunk the chunks are spread over a process pool of `workers`
+    (default: one per CPU). index is an already opened (and far enough extended)
+    PrimeIndex to use instead of opening index_path; processes running
+    concurrently pass one so that only their parent extends the file.
+    Returns a DataFrame with Candidate and COMPUTED_COLS in input order.
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    if len(numbers) == 0:
+        return pd.DataFrame({"Candidate": numbers, **{col: np.empty(0) for col in COMPUTED_COLS}})
+
+    if index is None:
+        # Extend the on-disk sieve once here so this call's workers never append to it concurrently
+        index = prime_index.load_prime_index(index_path, limit=int(numbers.max()) + GAP_MARGIN)
+    chunks = [numbers[start:start + chunk_size] for start in range(0, len(numbers), chunk_size)]
+    workers = min(len(chunks), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        blocks = [gap_features(chunk, index) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(pool.map(_features_chunk, chunks, repeat(index.path)))
+
+    features = pd.DataFrame(np.vstack(blocks), columns=COMPUTED_COLS)
+    features.insert(0, "Candidate", numbers)
+    return features
+
+class FeatureCache:
+    """
+    Computed features keyed by Candidate. Entries are only valid for the
+    FEATURE_VERSION they were computed with; loading under another version
+    starts empty.
+    """
+
+    def __init__(self, version=FEATURE_VERSION, table=None):
+        self.version = version
+        self.table = table if table is not None else pd.DataFrame(
+            columns=COMPUTED_COLS, dtype=np.float64, index=pd.Index([], name="Candidate", dtype=np.int64)
+        )
+
+    @classmethod
+    def load(cls, version=FEATURE_VERSION, path=CACHE_PATH):
+        if not io_utils.table_exists(path):
+            return cls(version)
+        table = io_utils.load_table(path)
+        if table.empty or table["FeatureVersion"].iloc[0] != version:
+            print("♻️ Feature cache was built with other feature definitions. Starting fresh.")
+            return cls(version)
+        return cls(version, table.set_index("Candidate")[COMPUTED_COLS])
+
+    def lookup(self, candidates):
+        # Returns (hit mask, feature matrix); rows are NaN where the mask is False
+        hit = np.isin(candidates, self.table.index.to_numpy())
+        X = np.full((len(candidates), len(COMPUTED_COLS)), np.nan)
+        X[hit] = self.table.reindex(candidates[hit]).to_numpy()
+        return hit, X
+
+    def update(self, features):
+        new = features.set_index("Candidate")[COMPUTED_COLS]
+        new = new[~new.index.duplicated() & ~new.index.isin(self.table.index)]
+        if len(new):
+            self.table = new if self.table.empty else pd.concat([self.table, new])
+
+    def save(self, path=CACHE_PATH):
+        table = self.table.reset_index()
+        table["FeatureVersion"] = self.version
+        io_utils.save_table(table, path)
+
+def featurize(df, cache=None, workers=None, chunk_size=CHUNK_SIZE, index=None):
+    """
+    Replace the COMPUTED_COLS of df with values computed from its Candidate
+    integers; BoundaryTransitionIndex is left as drawn from the anchor. With a FeatureCache, candidates seen before are filled from it and
+    only new ones are computed (then added to the cache). index is passed on to
+    compute_features. Returns df.
+    """
+    candidates = df["Candidate"].to_numpy(dtype=np.int64)
+    if cache is None:
+        hit, X = np.zeros(len(candidates), dtype=bool), np.full((len(candidates), len(COMPUTED_COLS)), np.nan)
+    else:
+        hit, X = cache.lookup(candidates)
+
+    missing = np.unique(candidates[~hit])
+    if len(missing):
+        computed = compute_features(missing, workers=workers, chunk_size=chunk_size, index=index)
+        positions = np.searchsorted(missing, candidates[~hit])
+        X[~hit] = computed[COMPUTED_COLS].to_numpy()[positions]
+        if cache is not None:
+            cache.update(computed)
+
+    df[COMPUTED_COLS] = X
+    print(f"🔬 Features for {len(candidates)} candidates: {len(missing)} computed, {int(hit.sum())} from cache.")
+    return df
@@ -0,0 +1,212 @@
+import atexit
+import cProfile
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # not available on Windows; RSS figures are reported as None
+    resource = None
+
+MANIFEST_DIR = "output/runs"
+
+def peak_rss_mb(who="self"):
+    # Process high-water RSS in MB (ru_maxrss is KB on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    return usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 1024)
+
+def children_cpu_s():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+class Stage:
+    """
+    Handle yielded by stage(); set .rows (and optionally .meta entries) inside the block.
+    """
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.meta = {}
+
+class RunManifest:
+    """
+    Per-run record of stage timings, CPU time, peak RSS and row counts.
+    Written as JSON to output/runs/ when the run finishes (or the process exits).
+    """
+
+    _sequence = itertools.count()
+
+    def __init__(self, entry_point, profile=False, manifest_dir=MANIFEST_DIR):
+        self.entry_point = entry_point
+        self.started_at = datetime.now()
+        self.run_id = f"{entry_point}_{self.started_at.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        sequence = next(RunManifest._sequence)
+        if sequence:
+            # Later runs of a long-lived process (the service) could share a second with an earlier one
+            self.run_id += f"_{sequence}"
+        self.manifest_dir = manifest_dir
+        self.argv = list(sys.argv)
+        self.stages = []
+        self.meta = {}
+        self.status = "running"
+        self._depth = 0
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._children_cpu0 = children_cpu_s()
+        self.profiler = cProfile.Profile() if profile else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = Stage(name, rows)
+        wall0, cpu0, rss0 = time.perf_counter(), time.process_time(), peak_rss_mb()
+        offset = wall0 - self._wall0
+        status = "completed"
+        self._depth += 1
+        try:
+            yield record
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            self._depth -= 1
+            rss1 = peak_rss_mb()
+            entry = {
+                "stage": name,
+                "depth": self._depth,
+                "status": status,
+                "start_offset_s": round(offset, 6),
+                "wall_s": round(time.perf_counter() - wall0, 6),
+                "cpu_s": round(time.process_time() - cpu0, 6),
+                "peak_rss_mb": rss1,
+                "peak_rss_growth_mb": None if rss1 is None else round(rss1 - rss0, 3),
+                "rows": None if record.rows is None else int(record.rows),
+            }
+            if record.meta:
+                entry["meta"] = record.meta
+            self.stages.append(entry)
+
+    def to_dict(self):
+        children_cpu = children_cpu_s()
+        return {
+            "run_id": self.run_id,
+            "entry_point": self.entry_point,
+            "argv": self.argv,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._wall0, 6),
+            "cpu_s": round(time.process_time() - self._cpu0, 6),
+            "children_cpu_s": None if children_cpu is None else round(children_cpu - self._children_cpu0, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": peak_rss_mb("children"),
+            "stages": self.stages,
+            "meta": self.meta,
+        }
+
+    def write(self, status="completed"):
+        self.status = status
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        manifest = self.to_dict()
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            profile_path = os.path.join(self.manifest_dir, f"{self.run_id}.prof")
+            self.profiler.dump_stats(profile_path)
+            manifest["profile"] = profile_path
+
+        path = os.path.join(self.manifest_dir, f"{self.run_id}.json")
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=4)
+        print(f"🧾 Run manifest saved: {path}")
+        return path
+
+# === Active run (module level, so engine code can record stages without threading a handle) ===
+_active = None
+_original_excepthook = None  # set while a run's hooks are installed
+
+def _excepthook(exc_type, exc, tb):
+    if _active is not None:
+        _active.status = "failed"
+    (_original_excepthook or sys.__excepthook__)(exc_type, exc, tb)
+
+def _finish_at_exit():
+    if _active is not None:
+        finish_run("failed" if _active.status == "failed" else "completed")
+
+def _install_hooks():
+    # Only while a run is active, so importing this module changes nothing
+    global _original_excepthook
+    if _original_excepthook is None:
+        _original_excepthook = sys.excepthook
+        sys.excepthook = _excepthook
+        atexit.register(_finish_at_exit)
+
+def _remove_hooks():
+    global _original_excepthook
+    if _original_excepthook is not None:
+        if sys.excepthook is _excepthook:
+            sys.excepthook = _original_excepthook
+        atexit.unregister(_finish_at_exit)
+        _original_excepthook = None
+
+def _profile_requested():
+    return os.environ.get("REGINA_PROFILE", "") not in ("", "0")
+
+def start_run(entry_point, profile=None, manifest_dir=MANIFEST_DIR):
+    """
+    Begin recording a run. The manifest is written by finish_run(), or at
+    interpreter exit (status "failed" after an uncaught exception).
+    cProfile is enabled when profile is True or REGINA_PROFILE is set.
+    """
+    global _active
+    if _active is not None:
+        finish_run()
+    _active = RunManifest(entry_point, _profile_requested() if profile is None else profile, manifest_dir)
+    _install_hooks()
+    return _active
+
+def finish_run(status="completed"):
+    global _active
+    run, _active = _active, None
+    _remove_hooks()
+    return run.write(status) if run is not None else None
+
+def current_run():
+    return _active
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Record a stage on the active run; without an active run this only yields a Stage handle.
+    """
+    if _active is None:
+        yield Stage(name, rows)
+        return
+    with _active.stage(name, rows) as record:
+        yield record
+
+def instrumented(name):
+    # Decorator form of stage(); row counts come from len() of the return value when available
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                result = fn(*args, **kwargs)
+                if hasattr(result, "__len__"):
+                    record.rows = len(result)
+                return result
+        return wrapper
+    return decorator
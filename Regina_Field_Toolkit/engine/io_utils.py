@@ -1,7 +1,213 @@
+import glob
+import importlib.util
+import os
 import pandas as pd
 
 def load_csv(path):
     return pd.read_csv(path)
 
 def save_csv(df, path):
-    df.to_csv(path, index=False)
\ No newline at end of file
+    df.to_csv(path, index=False)
+
+# === Pluggable table storage ===
+# Tables are addressed by their legacy CSV path (e.g. output/refinement/combined_with_boundary.csv);
+# the active backend swaps the extension. Appendable tables such as the score tracking log are
+# stored as a directory of part files so each cycle only writes its own rows.
+
+class CsvBackend:
+    suffix = ".csv"
+
+    def read(self, path, columns=None):
+        return pd.read_csv(path, usecols=columns)
+
+    def write(self, df, path):
+        df.to_csv(path, index=False)
+
+class ParquetBackend:
+    suffix = ".parquet"
+
+    def read(self, path, columns=None):
+        return pd.read_parquet(path, columns=columns)
+
+    def write(self, df, path):
+        df.to_parquet(path, index=False)
+
+class ArrowIpcBackend:
+    suffix = ".arrow"
+
+    def read(self, path, columns=None):
+        return pd.read_feather(path, columns=columns)
+
+    def write(self, df, path):
+        df.reset_index(drop=True).to_feather(path)
+
+BACKENDS = {"csv": CsvBackend, "parquet": ParquetBackend, "arrow": ArrowIpcBackend}
+DEFAULT_BACKEND = os.environ.get(
+    "REGINA_STORAGE_BACKEND",
+    "parquet" if importlib.util.find_spec("pyarrow") is not None else "csv",
+)
+
+def get_backend(name=None):
+    # Accepts a backend name, an existing backend instance, or None for the default
+    if name is not None and not isinstance(name, str):
+        return name
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+def table_path(path, backend=None):
+    return os.path.splitext(path)[0] + get_backend(backend).suffix
+
+def _part_files(directory, backend):
+    return sorted(glob.glob(os.path.join(directory, f"part-*{backend.suffix}")))
+
+def _write_atomic(df, path, backend):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    backend.write(df, tmp_path)
+    os.replace(tmp_path, path)
+
+def migrate_csv(path, backend=None):
+    """
+    One-time conversion of a legacy CSV table to the active backend.
+    The original CSV is left in place; later reads use the converted table.
+    """
+    backend = get_backend(backend)
+    target = table_path(path, backend)
+    if isinstance(backend, CsvBackend) or os.path.exists(target) or not os.path.exists(path):
+        return target
+    _write_atomic(pd.read_csv(path), target, backend)
+    print(f"📦 Migrated {path} -> {target}")
+    return target
+
+def table_exists(path, backend=None):
+    return os.path.exists(table_path(path, backend)) or os.path.exists(path)
+
+def load_table(path, columns=None, backend=None):
+    """
+    Load a table (single file or partitioned directory), reading only the
+    requested columns. A legacy CSV is migrated on first access.
+    """
+    backend = get_backend(backend)
+    target = migrate_csv(path, backend)
+
+    if os.path.isdir(target):
+        parts = [backend.read(part, columns) for part in _part_files(target, backend)]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True)
+    return backend.read(target, columns)
+
+def save_table(df, path, backend=None):
+    backend = get_backend(backend)
+    _write_atomic(df, table_path(path, backend), backend)
+
+def append_table(df, path, backend=None):
+    """
+    Append rows without rewriting history: CSV tables append in place, columnar
+    tables get a new part file in the table directory.
+    """
+    backend = get_backend(backend)
+    target = migrate_csv(path, backend)
+
+    if isinstance(backend, CsvBackend):
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        df.to_csv(target, mode="a", header=not os.path.exists(target), index=False)
+        return
+
+    _ensure_partitioned(target, backend)
+    existing = _part_files(target, backend)
+    next_id = _part_id(existing[-1]) + 1 if existing else 0
+    _write_atomic(df, os.path.join(target, f"part-{next_id:06d}{backend.suffix}"), backend)
+
+def _part_id(part):
+    return int(os.path.basename(part)[5:11])
+
+def _ensure_partitioned(target, backend):
+    if os.path.isfile(target):
+        # Convert a single-file table into the partitioned layout
+        staged = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.first")
+        os.replace(target, staged)
+        os.makedirs(target)
+        os.replace(staged, os.path.join(target, f"part-000000{backend.suffix}"))
+    os.makedirs(target, exist_ok=True)
+
+# === Chunked reads (bounded memory) ===
+
+def _stored_path(path, backend=None):
+    # The backend copy of a logical table when it exists, otherwise the path as given
+    target = table_path(path, backend)
+    return target if os.path.exists(target) else path
+
+def _source_files(source):
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, f"part-*{os.path.splitext(source)[1]}")))
+    return [source]
+
+def table_columns(path, backend=None):
+    # Column names of a stored table, read from the header/schema only
+    source = _source_files(_stored_path(path, backend))[0]
+    if source.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(source).names
+    if source.endswith(".arrow"):
+        import pyarrow.ipc
+
+        return pyarrow.ipc.open_file(source).schema.names
+    return list(pd.read_csv(source, nrows=0).columns)
+
+def _below_minimum(row_group, schema, min_values):
+    # True when a Parquet row group's statistics show every value of a filtered column below its minimum
+    for col, value in min_values.items():
+        stats = row_group.column(schema.get_field_index(col)).statistics
+        if stats is not None and stats.has_min_max and stats.max < value:
+            return True
+    return False
+
+def iter_chunks(path, columns=None, dtypes=None, chunksize=250_000, backend=None, min_values=None):
+    """
+    Yield a stored table (or a plain CSV/Parquet/Arrow file) as DataFrames of at
+    most chunksize rows, reading only the requested columns and casting them to
+    dtypes. Nothing beyond the current chunk is held in memory; legacy CSVs are
+    streamed as they are rather than migrated. min_values ({column: minimum})
+    keeps only rows at or above each minimum; Parquet row groups whose
+    statistics rule them out are not read at all.
+    """
+    dtypes = dtypes or {}
+    min_values = min_values or {}
+    for source in _source_files(_stored_path(path, backend)):
+        if source.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(source)
+            row_groups = [i for i in range(parquet.num_row_groups)
+                          if not _below_minimum(parquet.metadata.row_group(i), parquet.schema_arrow, min_values)]
+            if not row_groups:
+                continue
+            chunks = (batch.to_pandas() for batch in
+                      parquet.iter_batches(batch_size=chunksize, columns=columns, row_groups=row_groups))
+        elif source.endswith(".arrow"):
+            import pyarrow.ipc
+
+            reader = pyarrow.ipc.open_file(source)
+            chunks = ((reader.get_batch(i).select(columns) if columns else reader.get_batch(i)).to_pandas()
+                      for i in range(reader.num_record_batches))
+        else:
+            chunks = pd.read_csv(source, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+        for chunk in chunks:
+            for col, value in min_values.items():
+                chunk = chunk[chunk[col] >= value]
+            yield chunk.astype({col: dtype for col, dtype in dtypes.items() if col in chunk.columns})
+
+def drop_table(path, backend=None):
+    # Remove a stored table (single file or partitioned directory) if present
+    import shutil
+
+    target = table_path(path, backend)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
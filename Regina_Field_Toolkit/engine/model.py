@@ -1,32 +1,211 @@
-from sklearn.ensemble import RandomForestClassifier
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from engine import io_utils
+
+FEATURES = ["MotifSum", "Entropy", "HilbertMag", "BoundaryTransitionIndex"]
+MODEL_PATH = "output/refinement/boundary_model.joblib"
+CACHE_PATH = "output/refinement/boundary_score_cache.csv"
+MAX_TREES = 500  # incremental updates fall back to a full retrain past this size
+N_JOBS = -1  # cores used for fitting and prediction (-1: all)
+PREDICT_CHUNK_ROWS = 50_000  # upper bound on rows per prediction task
+VERSION_COL = "ModelVersion"  # dataset column naming the model version its BoundaryScores came from
 
 def train_boundary_model(df, label_col="IsPrime"):
     """
     Train a simple random forest model to classify prime-like vs non-prime-like
     based on current structural features.
     """
+    from sklearn.ensemble import RandomForestClassifier
     from sklearn.model_selection import train_test_split
     from sklearn.metrics import classification_report
 
-    features = ["MotifSum", "Entropy", "HilbertMag", "BoundaryTransitionIndex"]
-    df_clean = df.dropna(subset=features + [label_col])
-    X = df_clean[features]
+    df_clean = df.dropna(subset=FEATURES + [label_col])
+    X = df_clean[FEATURES]
     y = df_clean[label_col]
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.25, random_state=42)
 
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
+    clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=N_JOBS)
     clf.fit(X_train, y_train)
+    clf.version_ = uuid.uuid4().hex[:16]
 
     y_pred = clf.predict(X_test)
     print(classification_report(y_test, y_pred))
 
     return clf
 
-def apply_boundary_model(df, model):
+def update_boundary_model(model, df, new_mask, label_col="IsPrime", n_new_trees=10, replay_size=1000):
+    """
+    Warm-start the forest with n_new_trees extra trees fit on the newly integrated
+    rows plus a replay sample of existing rows, so both classes stay represented.
+    Existing trees are left untouched. new_mask is a boolean array aligned with df.
+    """
+    new_mask = np.asarray(new_mask, dtype=bool)
+    new_rows = df[new_mask].dropna(subset=FEATURES + [label_col])
+    old_rows = df[~new_mask].dropna(subset=FEATURES + [label_col])
+    replay = old_rows.sample(min(replay_size, len(old_rows)), random_state=len(model.estimators_))
+
+    train = pd.concat([new_rows, replay])
+    y = train[label_col].astype(int)
+    if y.nunique() < 2:
+        raise ValueError("❌ Incremental update needs both prime (1) and non-prime (0) rows.")
+
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees, n_jobs=N_JOBS)
+    model.fit(train[FEATURES], y)
+    model.version_ = uuid.uuid4().hex[:16]
+    print(f"🌲 Boundary model warm-started: +{n_new_trees} trees on {len(new_rows)} new rows "
+          f"({len(model.estimators_)} total).")
+    return model
+
+# === Inference ===
+
+def _tree_proba_sum(trees, X):
+    total = np.zeros(len(X))
+    for tree in trees:
+        total += tree.predict_proba(X, check_input=False)[:, 1]
+    return total
+
+def tree_proba_sum(trees, X, n_jobs=N_JOBS, chunk_rows=PREDICT_CHUNK_ROWS):
+    """
+    Sum of the class-1 probabilities of trees for every row of X. Rows are split
+    into chunks predicted on a thread pool (tree traversal releases the GIL), so
+    memory per task stays bounded and all cores are used even for one frame.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    workers = os.cpu_count() if n_jobs in (None, -1) else max(1, n_jobs)
+    rows = max(1_000, min(chunk_rows, -(-len(X) // workers)))
+    starts = range(0, len(X), rows)
+    if workers == 1 or len(starts) <= 1:
+        return _tree_proba_sum(trees, X)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(lambda start: _tree_proba_sum(trees, X[start:start + rows]), starts)
+        return np.concatenate(list(parts))
+
+def predict_boundary(model, X, n_jobs=N_JOBS):
+    # Same values as model.predict_proba(X)[:, 1], predicted in parallel chunks
+    return tree_proba_sum(model.estimators_, X, n_jobs) / len(model.estimators_)
+
+def model_version(model):
+    # Identifier of the exact fitted forest; changes on every train or warm-start update
+    return getattr(model, "version_", None)
+
+def scored_by(df, model):
+    # True when every stored BoundaryScore in df is stamped with this model's version
+    return VERSION_COL in df.columns and bool((df[VERSION_COL] == model_version(model)).all())
+
+def feature_hashes(df):
+    # 64-bit fingerprint of each row's boundary features, hashed as float32 so
+    # float64 tables and compact (streamed) chunks produce the same keys
+    return pd.util.hash_pandas_object(df[FEATURES].astype(np.float32).reset_index(drop=True), index=False).to_numpy()
+
+class BoundaryScoreCache:
+    """
+    BoundaryScore memo keyed by feature hash. Entries are only valid for the
+    model version they were computed with; loading under another version
+    starts empty.
+    """
+
+    def __init__(self, version, scores=None):
+        self.version = version
+        self.scores = scores if scores is not None else pd.Series(dtype=np.float64)
+
+    @classmethod
+    def load(cls, version, path=CACHE_PATH):
+        if version is None or not io_utils.table_exists(path):
+            return cls(version)
+        table = io_utils.load_table(path)
+        if table.empty or table["ModelVersion"].iloc[0] != version:
+            print("♻️ Boundary score cache was built by another model version. Starting fresh.")
+            return cls(version)
+        return cls(version, pd.Series(table["BoundaryScore"].to_numpy(), index=table["FeatureHash"].to_numpy(np.uint64)))
+
+    def lookup(self, hashes):
+        # Returns (hit mask, scores); scores are NaN where the mask is False.
+        # Hash-table lookup, so the cost follows len(hashes) rather than the cache size
+        positions = self.scores.index.get_indexer(hashes)
+        hit = positions >= 0
+        scores = np.full(len(hashes), np.nan)
+        scores[hit] = self.scores.to_numpy()[positions[hit]]
+        return hit, scores
+
+    def update(self, hashes, scores):
+        new = pd.Series(scores, index=hashes)
+        new = new[~new.index.duplicated() & ~new.index.isin(self.scores.index)]
+        if len(new):
+            self.scores = new if self.scores.empty else pd.concat([self.scores, new])
+
+    def save(self, path=CACHE_PATH):
+        io_utils.save_table(pd.DataFrame({
+            "FeatureHash": self.scores.index.to_numpy(np.uint64),
+            "BoundaryScore": self.scores.to_numpy(),
+            "ModelVersion": self.version,
+        }), path)
+
+def apply_boundary_model(df, model, cache=None, update_cache=True):
     """
     Apply trained model to calculate updated boundary likelihoods.
+    With a BoundaryScoreCache for this model version, rows whose features were
+    already scored are filled from the cache and only the rest are predicted.
+    With update_cache=False the cache is only read, so it does not grow.
+    """
+    if cache is None:
+        df["BoundaryScore"] = predict_boundary(model, df[FEATURES])
+        return df
+
+    hashes = feature_hashes(df)
+    hit, scores = cache.lookup(hashes)
+    if (~hit).any():
+        scores[~hit] = predict_boundary(model, df.loc[~hit, FEATURES])
+        if update_cache:
+            cache.update(hashes[~hit], scores[~hit])
+    df["BoundaryScore"] = scores
+    return df
+
+def apply_boundary_model_incremental(df, model, n_prev_trees):
+    """
+    Update BoundaryScore after update_boundary_model added trees.
+
+    Rows without a BoundaryScore get a full prediction.
+    For every other row the stored score is the mean over the first n_prev_trees
+    trees, so only the added trees are evaluated and folded into that mean.
     """
-    features = ["MotifSum", "Entropy", "HilbertMag", "BoundaryTransitionIndex"]
-    df["BoundaryScore"] = model.predict_proba(df[features])[:, 1]
-    return df
\ No newline at end of file
+    if "BoundaryScore" not in df.columns:
+        df["BoundaryScore"] = np.nan
+    stale = df["BoundaryScore"].isna().to_numpy()
+
+    scores = df["BoundaryScore"].to_numpy(dtype=np.float64, copy=True)
+    X = df[FEATURES].to_numpy(dtype=np.float32)
+
+    if stale.any():
+        scores[stale] = predict_boundary(model, X[stale])
+
+    new_trees = model.estimators_[n_prev_trees:]
+    if new_trees and (~stale).any():
+        added = tree_proba_sum(new_trees, X[~stale])
+        scores[~stale] = (scores[~stale] * n_prev_trees + added) / len(model.estimators_)
+
+    df["BoundaryScore"] = scores
+    print(f"🎯 Boundary scores: {int(stale.sum())} rows fully scored, "
+          f"{int((~stale).sum())} updated with {len(new_trees)} new trees.")
+    return df
+
+def save_boundary_model(model, path=MODEL_PATH):
+    import joblib
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(model, path)
+
+def load_boundary_model(path=MODEL_PATH):
+    # Returns None when no model has been saved yet
+    if not os.path.exists(path):
+        return None
+    import joblib
+
+    model = joblib.load(path)
+    if model_version(model) is None:
+        # Saved before models carried a version; the file timestamp identifies it
+        model.version_ = f"legacy-{int(os.path.getmtime(path))}"
+    return model
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+from engine import model
+
+INDEX_PATH = "output/refinement/novelty_index.joblib"
+MIN_DISTANCE = 0.05  # in standard deviations of the combined features; 0 disables the filter
+REBUILD_FRACTION = 0.1  # merge the append buffer into the KD-tree once it reaches this share
+
+class NoveltyIndex:
+    """
+    Nearest-neighbour index over the standardized boundary features of the
+    combined dataset. Points are added incrementally: new rows go into a small
+    buffer with its own KD-tree, which is merged into the main tree once it
+    grows past REBUILD_FRACTION of it. The standardization is fixed when
+    the index is built, so distances stay comparable across cycles.
+    """
+
+    def __init__(self, mean, scale, points):
+        self.mean = mean
+        self.scale = scale
+        self.points = np.empty((0, len(model.FEATURES))) if points is None else points
+        self.buffer = np.empty((0, len(model.FEATURES)))
+        self.n_rows = len(self.points)
+        self._build_tree()
+        self._build_buffer_tree()
+
+    @classmethod
+    def build(cls, df):
+        X = df[model.FEATURES].to_numpy(dtype=np.float64)
+        mean = np.nanmean(X, axis=0) if len(X) else np.zeros(X.shape[1])
+        scale = np.nanstd(X, axis=0) if len(X) else np.ones(X.shape[1])
+        scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+        index = cls(np.nan_to_num(mean), scale, None)
+        index.add(df)
+        return index
+
+    def _build_tree(self):
+        from scipy.spatial import cKDTree
+
+        self.tree = cKDTree(self.points) if len(self.points) else None
+
+    def _build_buffer_tree(self):
+        from scipy.spatial import cKDTree
+
+        self.buffer_tree = cKDTree(self.buffer) if len(self.buffer) else None
+
+    def transform(self, df):
+        # Standardize with the build-time statistics; missing features sit at the mean
+        X = (df[model.FEATURES].to_numpy(dtype=np.float64) - self.mean) / self.scale
+        return np.nan_to_num(X, nan=0.0)
+
+    def add(self, df):
+        if df.empty:
+            return
+        self.buffer = np.vstack([self.buffer, self.transform(df)])
+        self.n_rows += len(df)
+        if len(self.buffer) >= max(1, REBUILD_FRACTION * len(self.points)):
+            self.points = np.vstack([self.points, self.buffer])
+            self.buffer = np.empty((0, len(model.FEATURES)))
+            self._build_tree()
+        self._build_buffer_tree()
+
+    def nearest_distance(self, df):
+        # Distance from every row of df to its nearest indexed point (inf for an empty index)
+        X = self.transform(df)
+        dist = np.full(len(X), np.inf)
+        for tree in (self.tree, self.buffer_tree):
+            if tree is not None and len(X):
+                dist = np.minimum(dist, tree.query(X, k=1)[0])
+        return dist
+
+    def filter(self, df, min_distance=MIN_DISTANCE):
+        """
+        Keep only rows farther than min_distance from every indexed point and from
+        every earlier kept row of df itself. Returns the filtered copy of df.
+        """
+        if min_distance <= 0 or df.empty:
+            return df
+        keep = self.nearest_distance(df) > min_distance
+
+        # Near-duplicates inside the batch: keep the first row of each close pair
+        from scipy.spatial import cKDTree
+
+        X = self.transform(df)
+        for i, j in sorted(cKDTree(X).query_pairs(min_distance)):
+            if keep[i] and keep[j]:
+                keep[j] = False
+        print(f"🧭 Novelty filter: {int((~keep).sum())} of {len(df)} candidates within {min_distance} of known points dropped.")
+        return df[keep].copy()
+
+def save_novelty_index(index, path=INDEX_PATH):
+    import joblib
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(index, path)
+
+def load_novelty_index(combined, path=INDEX_PATH):
+    """
+    Load the saved index and bring it in line with combined, which only grows by
+    appending rows: rows beyond those already indexed are added. The index is
+    rebuilt from scratch when none is saved or combined is smaller than the index
+    (the dataset was regenerated).
+    """
+    index = None
+    if os.path.exists(path):
+        import joblib
+
+        index = joblib.load(path)
+    if index is None or index.n_rows > len(combined):
+        return NoveltyIndex.build(combined)
+    index.add(combined.iloc[index.n_rows:])
+    return index
@@ -0,0 +1,159 @@
+import os
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; extensions are then not serialized across processes
+    fcntl = None
+
+# Odd-only prime bitset: bit i is set when 2*i + 1 is prime. Bits are packed
+# little-endian into bytes and stored raw on disk, so the covered limit is
+# implied by the file size and the file can be memory-mapped directly.
+DEFAULT_INDEX_PATH = "data/cache/prime_index.bin"
+SEGMENT_SPAN = 1 << 20  # integers covered per sieve segment
+SEGMENT_BYTES = SEGMENT_SPAN // 16  # odd numbers only, 8 per byte
+DEFAULT_LIMIT = 10_000_000
+
+def _small_primes(limit):
+    # Plain sieve for the base primes of a segment (limit is at most sqrt of the range)
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    for p in range(2, int(limit ** 0.5) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = False
+    return np.flatnonzero(sieve)
+
+def _sieve_segment(lo, hi, base_primes):
+    """
+    Sieve the odd numbers in [lo, hi) and return them as packed bits.
+    lo and hi must be multiples of SEGMENT_SPAN; base_primes are the odd primes
+    up to at least sqrt(hi), shared by every segment of one extension.
+    """
+    flags = np.ones((hi - lo) // 2, dtype=bool)  # flags[j] <-> lo + 2*j + 1
+    if lo == 0:
+        flags[0] = False  # 1 is not prime
+
+    for p in base_primes:
+        p = int(p)
+        if p * p >= hi:
+            break
+        start = max(p * p, ((lo + p - 1) // p) * p)
+        if start % 2 == 0:
+            start += p
+        if start >= hi:
+            continue
+        flags[(start - lo - 1) // 2::p] = False
+
+    return np.packbits(flags, bitorder="little")
+
+class PrimeIndex:
+    """
+    Memory-mapped primality lookup backed by a segmented sieve.
+
+    The on-disk bitset is extended one segment at a time whenever a query
+    reaches past the current limit, so lookups work for any non-negative
+    integer without a full rebuild.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, limit=DEFAULT_LIMIT):
+        self.path = path
+        self._bits = None
+        self._open()
+        self.ensure_limit(limit)
+
+    @property
+    def limit(self):
+        # Exclusive upper bound of the integers currently covered
+        return 0 if self._bits is None else len(self._bits) * 16
+
+    def _open(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self._bits = np.memmap(self.path, dtype=np.uint8, mode="r")
+        else:
+            self._bits = None
+
+    def ensure_limit(self, limit):
+        """
+        Sieve and append segments until every integer below limit is covered.
+        Extensions hold an exclusive lock on a sidecar lock file, and the file
+        size is re-read under it, so processes sharing the index never append
+        concurrently or sieve a range another one already added.
+        """
+        if limit <= self.limit:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._bits = None  # release the map before appending
+        with open(f"{self.path}.lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            with open(self.path, "ab") as f:
+                # A segment left half-written by an interrupted extension is dropped and sieved again
+                size = f.tell() - f.tell() % SEGMENT_BYTES
+                f.truncate(size)
+                start = size * 16
+                stop = -(-limit // SEGMENT_SPAN) * SEGMENT_SPAN
+                if start < stop:
+                    base_primes = _small_primes(int((stop - 1) ** 0.5) + 1)[1:]  # odd base primes, once per extension
+                    for lo in range(start, stop, SEGMENT_SPAN):
+                        f.write(_sieve_segment(lo, lo + SEGMENT_SPAN, base_primes).tobytes())
+            self._open()
+        if start < stop:
+            print(f"🧮 Prime index extended to {self.limit:,}: {self.path}")
+
+    def contains(self, values):
+        """
+        Vectorized membership test. Returns a boolean array shaped like values.
+        """
+        n = np.asarray(values, dtype=np.int64)
+        result = np.zeros(n.shape, dtype=bool)
+        if n.size == 0:
+            return result
+
+        self.ensure_limit(int(n.max()) + 1)
+        result[n == 2] = True
+        odd = (n >= 3) & (n % 2 == 1)
+        idx = n[odd] // 2
+        result[odd] = (self._bits[idx >> 3] >> (idx & 7).astype(np.uint8)) & 1
+        return result
+
+    def next_primes(self, values):
+        """
+        Vectorized successor: the smallest prime greater than each value.
+        """
+        n = np.asarray(values, dtype=np.int64)
+        current = np.maximum(n + 1, 2)
+        current = np.where((current > 2) & (current % 2 == 0), current + 1, current)
+        pending = ~self.contains(current)
+        while pending.any():
+            current[pending] += 2  # only odd numbers past 2 are checked
+            pending[pending] = ~self.contains(current[pending])
+        return current
+
+    def previous_primes(self, values):
+        """
+        Vectorized predecessor: the largest prime smaller than each value, or 0
+        where there is none (values <= 2).
+        """
+        n = np.asarray(values, dtype=np.int64)
+        current = n - 1
+        current = np.where((current > 2) & (current % 2 == 0), current - 1, current)
+        pending = (current >= 2) & ~self.contains(np.maximum(current, 0))
+        while pending.any():
+            current[pending] -= 2  # odd numbers >= 3 always reach 3
+            pending[pending] = ~self.contains(current[pending])
+        return np.where(current >= 2, current, 0)
+
+    def primes_up_to(self, limit):
+        """
+        Return every prime <= limit as a sorted int64 array.
+        """
+        if limit < 2:
+            return np.empty(0, dtype=np.int64)
+        self.ensure_limit(limit + 1)
+        n_odd = (limit + 1) // 2
+        flags = np.unpackbits(self._bits[: -(-n_odd // 8)], bitorder="little")[:n_odd]
+        odd_primes = np.flatnonzero(flags).astype(np.int64) * 2 + 1
+        return np.concatenate([np.array([2], dtype=np.int64), odd_primes])
+
+def load_prime_index(path=DEFAULT_INDEX_PATH, limit=DEFAULT_LIMIT):
+    return PrimeIndex(path, limit)
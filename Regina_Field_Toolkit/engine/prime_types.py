@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from engine import prime_index
+
+INT64_MAX = np.iinfo(np.int64).max
+
+# Finite, externally known lists (values beyond int64 can never match a dataset number)
+FIXED_PRIME_TYPES = {
+    "Mersenne": [2**p - 1 for p in [2, 3, 5, 7, 13, 17, 19, 31, 61, 89, 107, 127]],
+    "Fermat": [2**(2**n) + 1 for n in range(5)],  # Known Fermat primes: n=0 to 4
+    "Wilson": [5, 13, 563],
+    "Wieferich": [1093, 3511],
+}
+
+# Admissible prime triplets; every member of a matching tuple is tagged Constellation
+CONSTELLATION_PATTERNS = [(0, 2, 6), (0, 4, 6)]
+
+PRIME_TYPES = [
+    "Mersenne", "Fermat", "SophieGermain", "Twin", "Safe", "Super", "Palindromic",
+    "Wilson", "Wieferich", "Chen", "Cousin", "Emirp", "Gaussian", "Constellation",
+]
+
+def reverse_digits(n):
+    """
+    Reverse the decimal digits of every entry in a non-negative int64 array.
+    """
+    n = np.asarray(n, dtype=np.int64)
+    remaining = n.copy()
+    reversed_ = np.zeros_like(n)
+    active = remaining > 0
+    while active.any():
+        reversed_[active] = reversed_[active] * 10 + remaining[active] % 10
+        remaining[active] //= 10
+        active = remaining > 0
+    return reversed_
+
+class PrimeTypeClassifier:
+    """
+    Vectorized prime-type tagging backed by the sieve prime index.
+
+    Membership comes from a PrimeIndex and prime ranks (pi(p)) from a sorted
+    prime table that is built once and grown only when a larger number shows up.
+    """
+
+    def __init__(self, index=None):
+        self.index = index if index is not None else prime_index.load_prime_index()
+        self._primes = np.empty(0, dtype=np.int64)
+        self._rank_limit = 1
+
+    def is_prime(self, n):
+        n = np.asarray(n, dtype=np.int64)
+        result = np.zeros(n.shape, dtype=bool)
+        valid = n >= 0
+        result[valid] = self.index.contains(n[valid])
+        return result
+
+    def prime_rank(self, n):
+        """
+        Return pi(n), the number of primes <= n, for every entry of n.
+        """
+        n = np.asarray(n, dtype=np.int64)
+        if n.size and n.max() > self._rank_limit:
+            self._rank_limit = int(n.max())
+            self._primes = self.index.primes_up_to(self._rank_limit)
+        return np.searchsorted(self._primes, n, side="right")
+
+    def smallest_prime_factor(self, n):
+        """
+        Return the smallest prime factor of every entry of n (n itself when prime, 0 for n < 2).
+        """
+        n = np.asarray(n, dtype=np.int64)
+        spf = np.where(n >= 2, n, 0)
+        unresolved = np.flatnonzero((n >= 4) & ~self.is_prime(n))
+        if unresolved.size == 0:
+            return spf
+        base = self.index.primes_up_to(int(n[unresolved].max() ** 0.5) + 1)
+        for q in base:
+            hit = n[unresolved] % q == 0
+            spf[unresolved[hit]] = q
+            unresolved = unresolved[~hit]
+            if unresolved.size == 0:
+                break
+        return spf
+
+    def is_semiprime(self, n):
+        n = np.asarray(n, dtype=np.int64)
+        spf = self.smallest_prime_factor(n)
+        composite = (spf > 0) & (spf < n)
+        cofactor = np.where(composite, n // np.where(spf > 0, spf, 1), 0)
+        return composite & self.is_prime(cofactor)
+
+    def classify(self, numbers):
+        """
+        Tag every number with each supported prime type.
+
+        Returns a DataFrame indexed like numbers with a boolean IsPrime column
+        and one boolean column per entry of PRIME_TYPES.
+        """
+        index = numbers.index if isinstance(numbers, pd.Series) else None
+        n = np.asarray(numbers, dtype=np.int64)
+        prime = self.is_prime(n)
+        out = {col: np.zeros(n.shape, dtype=bool) for col in PRIME_TYPES}
+        out["IsPrime"] = prime
+
+        # Every remaining test only applies to primes, so work on that subset
+        p = n[prime]
+        tags = {}
+        for ptype, values in FIXED_PRIME_TYPES.items():
+            tags[ptype] = np.isin(p, [v for v in values if v <= INT64_MAX])
+
+        # Primality of p + k for every even k a twin/cousin/constellation test can reach
+        span = max(max(pattern) for pattern in CONSTELLATION_PATTERNS)
+        shifted = {k: self.is_prime(p + k) for k in range(-span, span + 1, 2) if k != 0}
+        shifted[0] = np.ones(p.shape, dtype=bool)
+
+        tags["Twin"] = shifted[-2] | shifted[2]
+        tags["Cousin"] = shifted[-4] | shifted[4]
+        tags["SophieGermain"] = self.is_prime(2 * p + 1)
+        tags["Safe"] = (p % 2 == 1) & self.is_prime((p - 1) // 2)
+        tags["Super"] = self.is_prime(self.prime_rank(p))
+
+        reversed_ = reverse_digits(p)
+        tags["Palindromic"] = reversed_ == p
+        tags["Emirp"] = (reversed_ != p) & self.is_prime(reversed_)
+
+        tags["Chen"] = shifted[2] | self.is_semiprime(np.where(shifted[2], 0, p + 2))
+        tags["Gaussian"] = p % 4 == 3
+
+        constellation = np.zeros(p.shape, dtype=bool)
+        for pattern in CONSTELLATION_PATTERNS:
+            for offset in pattern:
+                member = np.ones(p.shape, dtype=bool)
+                for step in pattern:
+                    member &= shifted[step - offset]
+                constellation |= member
+        tags["Constellation"] = constellation
+
+        for ptype in PRIME_TYPES:
+            out[ptype][prime] = tags[ptype]
+
+        return pd.DataFrame({col: out[col] for col in ["IsPrime"] + PRIME_TYPES}, index=index)
+
+def classify_prime_types(numbers, index=None):
+    return PrimeTypeClassifier(index).classify(numbers)
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from engine import io_utils
+
+MODEL_ROOT = "output/projection/models"
+MAX_NEW_FRACTION = 0.25  # refit once more than this share of rows has never been embedded
+
+# Landmark mode: above LANDMARK_THRESHOLD rows, PCA/UMAP are fitted on a PrimeStatus-balanced
+# subsample and every other row goes through transform in parallel chunks
+LANDMARK_THRESHOLD = 200_000
+LANDMARK_FRACTION = 0.05
+MIN_LANDMARKS = 5_000
+MAX_LANDMARKS = 100_000
+TRANSFORM_CHUNK_ROWS = 100_000
+
+PROJECTION_SETTINGS = {
+    "pca_components": 2,
+    "umap_n_neighbors": 15,
+    "umap_min_dist": 0.1,
+    "umap_metric": "euclidean",
+    "random_state": 42,
+}
+
+def settings_key(feature_cols, settings, use_umap, landmarks=None):
+    # Models are reusable only for the same features, settings, UMAP availability and landmark configuration
+    payload = {"features": list(feature_cols), "settings": settings, "umap": bool(use_umap)}
+    if landmarks is not None:
+        payload["landmarks"] = landmarks
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+def row_hashes(X):
+    # Stable 64-bit fingerprint per feature row, independent of the DataFrame index
+    return pd.util.hash_pandas_object(X.reset_index(drop=True), index=False).to_numpy()
+
+def select_landmarks(strata, fraction=LANDMARK_FRACTION, seed=None, min_landmarks=MIN_LANDMARKS, max_landmarks=MAX_LANDMARKS):
+    """
+    Positions of a landmark subsample balanced across strata (PrimeStatus values).
+    The budget (fraction of the rows, clipped to [min_landmarks, max_landmarks])
+    is split evenly between strata; a stratum smaller than its share contributes
+    all of its rows and the remainder goes to the larger ones.
+    Returns (sorted positions, landmarks per stratum).
+    """
+    rng = np.random.default_rng(seed)
+    strata = pd.Series(np.asarray(strata, dtype=object)).fillna("Unknown")
+    groups = sorted(strata.groupby(strata, sort=False).indices.items(), key=lambda item: len(item[1]))
+    budget = int(np.clip(round(fraction * len(strata)), min_landmarks, max_landmarks))
+
+    picks, counts = [], {}
+    for i, (label, positions) in enumerate(groups):
+        share = min(len(positions), (budget - sum(counts.values())) // (len(groups) - i))
+        picks.append(rng.choice(positions, size=share, replace=False))
+        counts[str(label)] = int(share)
+    return np.sort(np.concatenate(picks)) if picks else np.empty(0, dtype=np.int64), counts
+
+def fit_projection_models(X, settings, use_umap, fit_rows=None, incremental_pca=False, timings=None):
+    """
+    Fit scaler, PCA and (optionally) UMAP on X.
+
+    fit_rows (positions) restricts the PCA/UMAP fits to a landmark subsample; the
+    scaler always sees every row. incremental_pca fits IncrementalPCA over all rows
+    in batches instead. Wall time per phase is added to timings when given.
+    Returns (models, X_scaled, pca_proj, umap_proj) where the projections cover the
+    fitted rows (all of X without fit_rows); umap_proj is None when UMAP is disabled.
+    """
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    timings = {} if timings is None else timings
+    t0 = time.perf_counter()
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    X_fit = X_scaled if fit_rows is None else X_scaled[fit_rows]
+    t1 = time.perf_counter()
+    timings["scale"] = t1 - t0
+
+    if incremental_pca:
+        pca = IncrementalPCA(n_components=settings["pca_components"])
+        for start in range(0, len(X_scaled), TRANSFORM_CHUNK_ROWS):
+            batch = X_scaled[start:start + TRANSFORM_CHUNK_ROWS]
+            if len(batch) >= settings["pca_components"]:  # a short tail batch cannot be fitted on its own
+                pca.partial_fit(batch)
+        pca_proj = pca.transform(X_fit)
+    else:
+        pca = PCA(n_components=settings["pca_components"], random_state=settings["random_state"])
+        pca_proj = pca.fit_transform(X_fit)
+    t2 = time.perf_counter()
+    timings["pca_fit"] = t2 - t1
+
+    reducer, umap_proj = None, None
+    if use_umap:
+        import umap
+
+        reducer = umap.UMAP(
+            n_neighbors=settings["umap_n_neighbors"],
+            min_dist=settings["umap_min_dist"],
+            metric=settings["umap_metric"],
+            random_state=settings["random_state"],
+        )
+        umap_proj = reducer.fit_transform(X_fit)
+    timings["umap_fit"] = time.perf_counter() - t2
+
+    return {"scaler": scaler, "pca": pca, "umap": reducer}, X_scaled, pca_proj, umap_proj
+
+def transform_projection(models, X):
+    # Out-of-sample projection through already fitted models
+    return transform_scaled(models, models["scaler"].transform(X))
+
+def transform_scaled(models, X_scaled):
+    pca_proj = models["pca"].transform(X_scaled)
+    umap_proj = models["umap"].transform(X_scaled) if models["umap"] is not None else None
+    return pca_proj, umap_proj
+
+_worker_models = None
+
+def _init_transform_worker(models):
+    global _worker_models
+    _worker_models = models
+
+def _transform_chunk(X_scaled):
+    return transform_scaled(_worker_models, X_scaled)
+
+def transform_chunks(models, X_scaled, workers=None, chunk_rows=TRANSFORM_CHUNK_ROWS):
+    """
+    transform_scaled over row chunks of X_scaled. With more than one chunk and
+    worker, the chunks are projected in a process pool whose workers receive the
+    fitted models once. Workers are spawned fresh: forking after numba/OpenMP
+    threads have started (as UMAP does) is not safe.
+    """
+    chunks = [X_scaled[start:start + chunk_rows] for start in range(0, len(X_scaled), chunk_rows)]
+    workers = min(len(chunks), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        results = [transform_scaled(models, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_transform_worker, initargs=(models,)) as pool:
+            results = list(pool.map(_transform_chunk, chunks))
+
+    n_components = models["pca"].n_components_
+    pca_proj = np.vstack([pca for pca, _ in results]) if results else np.empty((0, n_components))
+    umap_proj = None
+    if models["umap"] is not None:
+        umap_proj = np.vstack([emb for _, emb in results]) if results else np.empty((0, 2))
+    return pca_proj, umap_proj
+
+def fit_with_landmarks(X, strata, settings, use_umap, fraction=LANDMARK_FRACTION, incremental_pca=False, workers=None):
+    """
+    Fit on a stratified landmark subsample of X and transform every other row in
+    parallel chunks. Returns (models, pca_proj, umap_proj, landmark info) with
+    projections for all rows of X in order.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    seed = settings["random_state"]
+    fit_rows, per_stratum = select_landmarks(strata, fraction, seed)
+    timings["landmarks"] = time.perf_counter() - t0
+
+    models, X_scaled, pca_fit, umap_fit = fit_projection_models(X, settings, use_umap, fit_rows, incremental_pca, timings)
+
+    t1 = time.perf_counter()
+    rest = np.ones(len(X), dtype=bool)
+    rest[fit_rows] = False
+    pca_rest, umap_rest = transform_chunks(models, X_scaled[rest], workers)
+    pca_proj = np.empty((len(X), pca_fit.shape[1]))
+    pca_proj[fit_rows], pca_proj[rest] = pca_fit, pca_rest
+    umap_proj = None
+    if use_umap:
+        umap_proj = np.empty((len(X), 2))
+        umap_proj[fit_rows], umap_proj[rest] = umap_fit, umap_rest
+    timings["transform"] = time.perf_counter() - t1
+
+    info = {
+        "landmark_fraction": fraction,
+        "seed": seed,
+        "landmarks": int(len(fit_rows)),
+        "landmarks_per_stratum": per_stratum,
+        "rows_transformed": int(rest.sum()),
+        "incremental_pca": incremental_pca,
+        "transform_workers": workers,
+        "phase_wall_s": {phase: round(seconds, 6) for phase, seconds in timings.items()},
+    }
+    return models, pca_proj, umap_proj, info
+
+def _embedding_frame(hashes, pca_proj, umap_proj):
+    embedding = pd.DataFrame({"RowHash": hashes, "PCA_X": pca_proj[:, 0], "PCA_Y": pca_proj[:, 1]})
+    if umap_proj is not None:
+        embedding["UMAP_X"] = umap_proj[:, 0]
+        embedding["UMAP_Y"] = umap_proj[:, 1]
+    return embedding
+
+def save_projection_models(model_dir, models, embedding, info):
+    import joblib
+
+    os.makedirs(model_dir, exist_ok=True)
+    for name, fitted in models.items():
+        if fitted is not None:
+            joblib.dump(fitted, os.path.join(model_dir, f"{name}.joblib"))
+    io_utils.save_table(embedding, os.path.join(model_dir, "embedding.csv"))
+    with open(os.path.join(model_dir, "manifest.json"), "w") as f:
+        json.dump(info, f, indent=4)
+
+def load_embedding(model_dir):
+    # Stored coordinates of every row the saved models have projected (None when nothing is saved)
+    if not os.path.exists(os.path.join(model_dir, "manifest.json")):
+        return None
+    return io_utils.load_table(os.path.join(model_dir, "embedding.csv"))
+
+def load_projection_models(model_dir, use_umap):
+    # Unpickling UMAP imports umap/numba, so this is only called when rows need transforming
+    import joblib
+
+    models = {"umap": None}
+    for name in ["scaler", "pca"] + (["umap"] if use_umap else []):
+        path = os.path.join(model_dir, f"{name}.joblib")
+        if not os.path.exists(path):
+            return None
+        models[name] = joblib.load(path)
+    return models
+
+def project_features(X, feature_cols, settings=PROJECTION_SETTINGS, use_umap=True, model_root=MODEL_ROOT,
+                     refit=False, max_new_fraction=MAX_NEW_FRACTION, strata=None, landmarks=None,
+                     landmark_fraction=LANDMARK_FRACTION, incremental_pca=False, workers=None):
+    """
+    Project X to 2D with PCA and UMAP, reusing saved models when possible.
+
+    Rows already embedded by the saved models keep their stored coordinates;
+    rows never seen before go through transform. A full refit happens when no
+    models are saved for these settings, when refit is requested, or when more
+    than max_new_fraction of the rows are new.
+
+    landmarks (None: automatic above LANDMARK_THRESHOLD rows) fits on a subsample
+    of landmark_fraction balanced by strata (PrimeStatus aligned with X) and
+    transforms the other rows in parallel chunks; incremental_pca uses
+    IncrementalPCA over all rows for the linear projection. Returns
+    (pca_proj, umap_proj, info); info carries the landmark settings and per-phase
+    wall times.
+    """
+    if landmarks is None:
+        landmarks = len(X) > LANDMARK_THRESHOLD
+    landmark_config = {"fraction": landmark_fraction, "incremental_pca": incremental_pca} if landmarks else None
+    key = settings_key(feature_cols, settings, use_umap, landmark_config)
+    model_dir = os.path.join(model_root, key)
+    hashes = row_hashes(X)
+    embedding = None if refit else load_embedding(model_dir)
+
+    if embedding is not None:
+        embedding = embedding.drop_duplicates(subset="RowHash").set_index("RowHash")
+        new_mask = ~np.isin(hashes, embedding.index.to_numpy())
+        reusable = new_mask.mean() <= max_new_fraction
+        models = load_projection_models(model_dir, use_umap) if reusable and new_mask.any() else {}
+
+        if reusable and models is not None:
+            t0 = time.perf_counter()
+            coord_cols = ["PCA_X", "PCA_Y"] + (["UMAP_X", "UMAP_Y"] if use_umap else [])
+            coords = np.empty((len(X), len(coord_cols)))
+            coords[~new_mask] = embedding.loc[hashes[~new_mask], coord_cols].to_numpy()
+
+            if new_mask.any():
+                pca_new, umap_new = transform_chunks(models, models["scaler"].transform(X[new_mask]), workers)
+                coords[new_mask, :2] = pca_new
+                if use_umap:
+                    coords[new_mask, 2:] = umap_new
+                added = _embedding_frame(hashes[new_mask], pca_new, umap_new)
+                io_utils.save_table(pd.concat([embedding.reset_index(), added], ignore_index=True), os.path.join(model_dir, "embedding.csv"))
+
+            info = {"mode": "transform", "settings_key": key, "model_dir": model_dir, "rows_transformed": int(new_mask.sum()),
+                    "phase_wall_s": {"transform": round(time.perf_counter() - t0, 6)}}
+            print(f"♻️ Reused projection models {key}: {int(new_mask.sum())} new rows transformed.")
+            return coords[:, :2], (coords[:, 2:] if use_umap else None), info
+
+    if landmarks:
+        if strata is None:
+            strata = np.full(len(X), "Unknown", dtype=object)
+        models, pca_proj, umap_proj, landmark_info = fit_with_landmarks(
+            X, strata, settings, use_umap, landmark_fraction, incremental_pca, workers
+        )
+        info = {"mode": "landmark_fit", "rows_fitted": landmark_info["landmarks"], **landmark_info}
+        print(f"📍 Fitted on {landmark_info['landmarks']} landmarks {landmark_info['landmarks_per_stratum']}; "
+              f"{landmark_info['rows_transformed']} rows transformed.")
+    else:
+        timings = {}
+        models, _, pca_proj, umap_proj = fit_projection_models(X, settings, use_umap, incremental_pca=incremental_pca,
+                                                               timings=timings)
+        info = {"mode": "fit", "rows_fitted": len(X), "incremental_pca": incremental_pca,
+                "phase_wall_s": {phase: round(seconds, 6) for phase, seconds in timings.items()}}
+    info.update(settings_key=key, model_dir=model_dir, fitted_at=datetime.now().strftime("%Y%m%d_%H%M%S"))
+    save_projection_models(model_dir, models, _embedding_frame(hashes, pca_proj, umap_proj), info)
+    print(f"💾 Projection models fitted and saved: {model_dir}")
+    return pca_proj, umap_proj, info
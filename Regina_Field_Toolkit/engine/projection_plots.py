@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+DENSITY_THRESHOLD = 50_000  # rows above which figures are binned instead of drawing every point
+GRID_BINS = 300
+FIGSIZE = (8, 6)
+
+def use_density(n_rows, mode="auto"):
+    # mode: "auto" (bin above DENSITY_THRESHOLD rows), "density" or "scatter"
+    if mode == "auto":
+        return n_rows > DENSITY_THRESHOLD
+    return mode == "density"
+
+def _pyplot():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+def _finite(data, *cols):
+    mask = np.ones(len(data), dtype=bool)
+    for col in cols:
+        mask &= np.isfinite(data[col].to_numpy(dtype=np.float64, na_value=np.nan))
+    return data[mask]
+
+def bin_grid(x, y, values=None, bins=GRID_BINS):
+    """
+    2D grid over the x/y extent: returns (counts, mean of values per cell or None, extent).
+    Empty cells hold NaN means so they render as background.
+    """
+    extent = [[x.min(), x.max()], [y.min(), y.max()]]
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=extent)
+    means = None
+    if values is not None:
+        sums, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+    return counts, means, (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+
+def _show_grid(ax, grid, extent, **kwargs):
+    # histogram2d indexes [x, y]; imshow wants rows = y
+    return ax.imshow(grid.T, origin="lower", extent=extent, aspect="auto", interpolation="nearest", **kwargs)
+
+def plot_projection(data, x, y, title, out_file, color_col="PrimeStatus", cmap=None, density=False):
+    plt = _pyplot()
+    if density:
+        from matplotlib.colors import LogNorm
+
+        data = _finite(data, x, y)
+        counts, _, extent = bin_grid(data[x].to_numpy(), data[y].to_numpy())
+        fig, ax = plt.subplots(figsize=FIGSIZE)
+        image = _show_grid(ax, np.where(counts > 0, counts, np.nan), extent, cmap="magma", norm=LogNorm())
+        fig.colorbar(image, label="Points per cell")
+        ax.set_title(f"{title} (density)")
+    else:
+        import seaborn as sns
+
+        fig, ax = plt.subplots(figsize=FIGSIZE)
+        sns.scatterplot(data=data, x=x, y=y, hue=color_col, palette=cmap, alpha=0.7, s=20, ax=ax)
+        ax.set_title(title)
+        ax.legend(loc="best")
+    fig.tight_layout()
+    fig.savefig(out_file)
+    plt.close(fig)
+    print(f"🖼️ Plot saved: {out_file}")
+
+def plot_heatmap(data, x, y, color_metric, title, out_file, density=False):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=FIGSIZE)
+    if density:
+        data = _finite(data, x, y, color_metric)
+        _, means, extent = bin_grid(data[x].to_numpy(), data[y].to_numpy(), data[color_metric].to_numpy())
+        image = _show_grid(ax, means, extent, cmap="viridis")
+        fig.colorbar(image, label=f"Mean {color_metric}")
+    else:
+        image = ax.scatter(data[x], data[y], c=data[color_metric], cmap="viridis", alpha=0.8, s=20)
+        fig.colorbar(image, label=color_metric)
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(out_file)
+    plt.close(fig)
+    print(f"🌡️ Heatmap saved: {out_file}")
+
+def plot_volatility_overlay(data, x, y, score_col, size_col, title, out_file, density=False):
+    plt = _pyplot()
+    if density:
+        # Mean score per cell, with mean volatility drawn as contour lines over it
+        data = _finite(data, x, y, score_col)
+        _, score_means, extent = bin_grid(data[x].to_numpy(), data[y].to_numpy(), data[score_col].to_numpy())
+        vol = _finite(data, size_col)
+        fig, ax = plt.subplots(figsize=FIGSIZE)
+        image = _show_grid(ax, score_means, extent, cmap="viridis")
+        fig.colorbar(image, label=f"Mean {score_col}")
+        if len(vol):
+            _, vol_means, _ = bin_grid(vol[x].to_numpy(), vol[y].to_numpy(), vol[size_col].to_numpy(), bins=GRID_BINS // 10)
+            if np.isfinite(vol_means).any():
+                # contour points at the centres of the coarse cells
+                xs = extent[0] + (np.arange(vol_means.shape[0]) + 0.5) * (extent[1] - extent[0]) / vol_means.shape[0]
+                ys = extent[2] + (np.arange(vol_means.shape[1]) + 0.5) * (extent[3] - extent[2]) / vol_means.shape[1]
+                contours = ax.contour(xs, ys, np.ma.masked_invalid(vol_means.T), levels=5, colors="white", linewidths=0.8)
+                ax.clabel(contours, fontsize=7, fmt="%.2g")
+        ax.set_title(f"{title} (density)")
+    else:
+        import seaborn as sns
+
+        fig, ax = plt.subplots(figsize=FIGSIZE)
+        sns.scatterplot(
+            data=data, x=x, y=y,
+            hue=score_col,
+            size=size_col,
+            sizes=(10, 200),
+            palette="viridis",
+            alpha=0.7,
+            legend="brief",
+            ax=ax,
+        )
+        ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(out_file)
+    plt.close(fig)
+    print(f"🌀 Volatility overlay saved: {out_file}")
+
+def _render(job):
+    plot, kwargs = job
+    plot(**kwargs)
+    return kwargs["out_file"]
+
+def render_figures(jobs, workers=None):
+    """
+    Render independent figures, each job being (plot function, kwargs). With more
+    than one job and worker they are drawn concurrently in separate processes.
+    Returns the output paths of the figures that rendered; a failing figure is
+    reported without stopping the others.
+    """
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        results = []
+        for job in jobs:
+            try:
+                results.append(_render(job))
+            except Exception as e:
+                print(f"⚠️ Figure {job[1]['out_file']} failed: {e}")
+        return results
+
+    results = []
+    # Spawned, not forked: this runs right after the UMAP fit/transform has started numba/OpenMP threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [(job, pool.submit(_render, job)) for job in jobs]
+        for job, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Figure {job[1]['out_file']} failed: {e}")
+    return results
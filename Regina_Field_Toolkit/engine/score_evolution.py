@@ -0,0 +1,173 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from engine import io_utils, score_log
+
+STATE_PATH = "output/refinement/score_evolution_state.csv"
+CHECKPOINT_PATH = "output/refinement/score_evolution_state.json"
+REPLAY_PATH = "output/refinement/score_evolution_replay.csv"  # last logged scores as of the checkpoint cycle
+
+FIRST_COLS = ["Score_prev", "BoundaryScore_prev"]
+STAT_COLS = ["Score_curr", "BoundaryScore_curr"]  # last, mean, std, min, max
+DELTA_COLS = ["Delta_Score", "Delta_Boundary"]  # sum, mean, max
+LOG_COLUMNS = ["Candidate", "Cycle"] + FIRST_COLS + STAT_COLS + DELTA_COLS
+FOLD_ROWS = 1_000_000  # rebuilt log rows gathered before each fold
+
+def _batch_stats(batch):
+    # Per-candidate statistics for one block of log rows, in the running-state layout
+    g = batch.groupby("Candidate", sort=False)
+    stats = {"Cycle_count": g["Cycle"].count()}
+    for col in FIRST_COLS:
+        stats[f"{col}_first"] = g[col].first()
+    for col in STAT_COLS:
+        n = g[col].count()
+        stats[f"{col}_count"] = n
+        stats[f"{col}_last"] = g[col].last()
+        stats[f"{col}_mean"] = g[col].mean()
+        stats[f"{col}_m2"] = g[col].var(ddof=0) * n
+        stats[f"{col}_min"] = g[col].min()
+        stats[f"{col}_max"] = g[col].max()
+    for col in DELTA_COLS:
+        stats[f"{col}_count"] = g[col].count()
+        stats[f"{col}_sum"] = g[col].sum()
+        stats[f"{col}_max"] = g[col].max()
+    return pd.DataFrame(stats)
+
+def fold(state, batch):
+    """
+    Merge a block of newly appended log rows into the running per-candidate state.
+    Means and variances are combined with the parallel form of Welford's update,
+    so the result matches a single pass over the full log.
+    """
+    new = _batch_stats(batch)
+    if state is None or state.empty:
+        return new
+
+    index = state.index.union(new.index)
+    a = state.reindex(index)
+    b = new.reindex(index)
+    out = pd.DataFrame(index=index)
+
+    out["Cycle_count"] = a["Cycle_count"].fillna(0) + b["Cycle_count"].fillna(0)
+    for col in FIRST_COLS:
+        out[f"{col}_first"] = a[f"{col}_first"].combine_first(b[f"{col}_first"])
+    for col in STAT_COLS:
+        na = a[f"{col}_count"].fillna(0).to_numpy()
+        nb = b[f"{col}_count"].fillna(0).to_numpy()
+        mean_a = a[f"{col}_mean"].fillna(0).to_numpy()
+        mean_b = b[f"{col}_mean"].fillna(0).to_numpy()
+        n = na + nb
+        delta = mean_b - mean_a
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, mean_a + delta * nb / n, np.nan)
+            m2 = a[f"{col}_m2"].fillna(0).to_numpy() + b[f"{col}_m2"].fillna(0).to_numpy() + np.where(n > 0, delta ** 2 * na * nb / n, 0.0)
+        out[f"{col}_count"] = n
+        out[f"{col}_last"] = b[f"{col}_last"].combine_first(a[f"{col}_last"])
+        out[f"{col}_mean"] = mean
+        out[f"{col}_m2"] = m2
+        out[f"{col}_min"] = np.fmin(a[f"{col}_min"], b[f"{col}_min"])
+        out[f"{col}_max"] = np.fmax(a[f"{col}_max"], b[f"{col}_max"])
+    for col in DELTA_COLS:
+        out[f"{col}_count"] = a[f"{col}_count"].fillna(0) + b[f"{col}_count"].fillna(0)
+        out[f"{col}_sum"] = a[f"{col}_sum"].fillna(0) + b[f"{col}_sum"].fillna(0)
+        out[f"{col}_max"] = np.fmax(a[f"{col}_max"], b[f"{col}_max"])
+    return out
+
+def summarize(state):
+    """
+    Build the per-candidate aggregate table (same columns as a full groupby over the log).
+    """
+    out = pd.DataFrame(index=state.index)
+    for prev, curr, delta in zip(FIRST_COLS, STAT_COLS, DELTA_COLS):
+        n = state[f"{curr}_count"]
+        out[f"{prev}_first"] = state[f"{prev}_first"]
+        out[f"{curr}_last"] = state[f"{curr}_last"]
+        out[f"{curr}_mean"] = state[f"{curr}_mean"]
+        out[f"{curr}_std"] = np.sqrt(state[f"{curr}_m2"] / (n - 1)).where(n > 1)
+        out[f"{curr}_min"] = state[f"{curr}_min"]
+        out[f"{curr}_max"] = state[f"{curr}_max"]
+        out[f"{delta}_sum"] = state[f"{delta}_sum"]
+        out[f"{delta}_mean"] = (state[f"{delta}_sum"] / state[f"{delta}_count"]).where(state[f"{delta}_count"] > 0)
+        out[f"{delta}_max"] = state[f"{delta}_max"]
+    out["Cycle_count"] = state["Cycle_count"].astype(np.int64)
+    return out.rename_axis("Candidate").reset_index()
+
+def load_state(state_path=STATE_PATH, checkpoint_path=CHECKPOINT_PATH):
+    # Returns (state, checkpoint); (None, None) when no state has been saved yet
+    if not os.path.exists(checkpoint_path) or not io_utils.table_exists(state_path):
+        return None, None
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+    return io_utils.load_table(state_path).set_index("Candidate"), checkpoint
+
+def save_state(state, checkpoint, state_path=STATE_PATH, checkpoint_path=CHECKPOINT_PATH, latest=None,
+               replay_path=REPLAY_PATH):
+    # latest (the last logged scores as of checkpoint["cycle"]) lets the next run replay only later cycles
+    io_utils.save_table(state.reset_index(), state_path)
+    if latest is not None:
+        io_utils.save_table(latest.assign(AsOfCycle=np.int32(checkpoint["cycle"])), replay_path)
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=4)
+    os.replace(tmp_path, checkpoint_path)
+
+def _load_latest(cycle_id, replay_path=REPLAY_PATH):
+    if io_utils.table_exists(replay_path):
+        latest = io_utils.load_table(replay_path)
+        if len(latest) and int(latest["AsOfCycle"].iloc[0]) == cycle_id:
+            return latest[["Candidate"] + score_log.SCORE_COLS]
+    raise ValueError(f"No saved replay state for checkpoint cycle {cycle_id}")
+
+def _fold_cycles(state, checkpoint, replay_path=REPLAY_PATH):
+    """
+    Fold the cycles recorded after checkpoint["cycle"], rebuilt from the delta
+    log in the full-row layout, in blocks of about FOLD_ROWS rows. Replay starts
+    from the scores saved with the checkpoint, so only later delta rows are read.
+    Returns (state, checkpoint, last logged scores, rows folded).
+    """
+    after, latest = -1, None
+    if checkpoint is not None:
+        if "cycle" not in checkpoint:
+            raise ValueError("Checkpoint predates the delta score log")
+        after = checkpoint["cycle"]
+        last = score_log.last_cycle_id()
+        if after > last:
+            raise ValueError(f"Checkpoint cycle {after} is past the end of the score log")
+        if after == last:
+            return state, checkpoint, None, 0
+        latest = _load_latest(after, replay_path)
+    replay = score_log.replay_from(after, latest)
+    n_rows, pending, blocks = 0, 0, []
+    for cycle_id, rows in replay.transitions():
+        blocks.append(rows)
+        pending += len(rows)
+        checkpoint = {"cycle": cycle_id}
+        if pending >= FOLD_ROWS:
+            state = fold(state, pd.concat(blocks, ignore_index=True))
+            n_rows, pending, blocks = n_rows + pending, 0, []
+    if blocks:
+        state = fold(state, pd.concat(blocks, ignore_index=True))
+        n_rows += pending
+    return state, checkpoint, replay.snapshot(), n_rows
+
+def update_state(state_path=STATE_PATH, checkpoint_path=CHECKPOINT_PATH, rebuild=False, replay_path=REPLAY_PATH):
+    """
+    Fold only the cycles logged since the last run into the persisted state.
+    Falls back to a full rebuild when the saved checkpoint no longer matches the log.
+    """
+    state, checkpoint = (None, None) if rebuild else load_state(state_path, checkpoint_path)
+    try:
+        state, checkpoint, latest, n_rows = _fold_cycles(state, checkpoint, replay_path)
+    except ValueError as e:
+        print(f"⚠️ {e}. Rebuilding score evolution state from the full log.")
+        state, checkpoint, latest, n_rows = _fold_cycles(None, None, replay_path)
+
+    if n_rows:
+        save_state(state, checkpoint, state_path, checkpoint_path, latest, replay_path)
+        print(f"📈 Folded {n_rows} rebuilt log rows into score evolution state ({len(state)} candidates).")
+    else:
+        print("📈 Score evolution state is up to date.")
+    if state is None:
+        state = _batch_stats(pd.DataFrame(columns=LOG_COLUMNS))
+    return state
@@ -0,0 +1,270 @@
+import os
+import numpy as np
+import pandas as pd
+from engine import io_utils
+
+# Delta-encoded score tracking: one row per candidate whose Score or BoundaryScore
+# moved more than TOLERANCE since its last logged value (new candidates always),
+# tagged with an integer cycle id. Cycle 0 is the baseline written by the first
+# tracked cycle. Full per-cycle snapshots are rebuilt by replaying the deltas.
+LOG_PATH = "output/refinement/score_delta_log.csv"
+CYCLES_PATH = "output/refinement/score_cycles.csv"
+LATEST_PATH = "output/refinement/score_latest.csv"  # last logged values, so writing never replays the log
+LEGACY_LOG_PATH = "output/refinement/score_tracking_log.csv"
+TOLERANCE = 1e-4
+
+SCORE_COLS = ["Score", "BoundaryScore"]
+LOG_DTYPES = {"CycleId": np.int32, "Candidate": np.int64, "Score": np.float32, "BoundaryScore": np.float32}
+TRANSITION_COLUMNS = ["Candidate", "Cycle", "Score_prev", "BoundaryScore_prev", "Score_curr", "BoundaryScore_curr",
+                      "Delta_Score", "Delta_Boundary"]
+
+def _compact(df, cycle_id):
+    out = pd.DataFrame({"CycleId": cycle_id, "Candidate": df["Candidate"].to_numpy()})
+    for col in SCORE_COLS:
+        out[col] = df[col].to_numpy() if col in df.columns else np.nan
+    return out.astype(LOG_DTYPES)
+
+def _changed(reference, current, tolerance):
+    # Rows of current that differ from reference by more than tolerance (NaN == NaN); reference is aligned
+    changed = np.zeros(len(current), dtype=bool)
+    for col in SCORE_COLS:
+        a = reference[col].to_numpy(dtype=np.float64)
+        b = current[col].to_numpy(dtype=np.float64)
+        both_nan = np.isnan(a) & np.isnan(b)
+        changed |= ~both_nan & ~(np.abs(b - a) <= tolerance)
+    return changed
+
+def load_cycles(path=CYCLES_PATH):
+    # Cycle metadata (CycleId, Timestamp, Candidates, Changed, Tolerance); empty before the first tracked cycle
+    migrate_legacy_log()
+    if not io_utils.table_exists(path):
+        return pd.DataFrame({"CycleId": pd.Series(dtype=np.int32), "Timestamp": pd.Series(dtype=object),
+                             "Candidates": pd.Series(dtype=np.int32), "Changed": pd.Series(dtype=np.int32),
+                             "Tolerance": pd.Series(dtype=np.float64)})
+    return io_utils.load_table(path).sort_values("CycleId", kind="stable").reset_index(drop=True)
+
+def _load_latest(last_cycle):
+    # Last logged value per candidate; rebuilt by replay when missing or behind the cycle table
+    if io_utils.table_exists(LATEST_PATH):
+        latest = io_utils.load_table(LATEST_PATH)
+        if len(latest) and int(latest["AsOfCycle"].iloc[0]) == last_cycle:
+            return latest[["Candidate"] + SCORE_COLS]
+    print("♻️ Rebuilding latest logged scores from the delta log.")
+    latest = None
+    for _, latest in iter_snapshots():
+        pass
+    return latest if latest is not None else _compact(pd.DataFrame({"Candidate": []}), 0)[["Candidate"] + SCORE_COLS]
+
+def _save_latest(latest, cycle_id, path=LATEST_PATH):
+    latest = latest[["Candidate"] + SCORE_COLS].copy()
+    latest["AsOfCycle"] = np.int32(cycle_id)
+    io_utils.save_table(latest, path)
+
+def _record_cycle(cycle_id, timestamp, candidates, changed, tolerance, path=CYCLES_PATH):
+    io_utils.append_table(pd.DataFrame({
+        "CycleId": [cycle_id], "Timestamp": [timestamp], "Candidates": [candidates], "Changed": [changed],
+        "Tolerance": [tolerance],
+    }).astype({"CycleId": np.int32, "Candidates": np.int32, "Changed": np.int32}), path)
+
+def _log_rows(df, cycle_id):
+    # One compacted row per Candidate (the last occurrence wins)
+    return _compact(df.drop_duplicates(subset="Candidate", keep="last"), cycle_id)
+
+def _diff(latest, current, tolerance):
+    # Rows of current that are new or moved more than tolerance from latest, and latest updated by them
+    reference = latest.set_index("Candidate").reindex(current["Candidate"].to_numpy())
+    delta = current[_changed(reference, current, tolerance)]
+    updated = pd.concat([latest[~latest["Candidate"].isin(delta["Candidate"])], delta[["Candidate"] + SCORE_COLS]],
+                        ignore_index=True)
+    return delta, updated
+
+def append_cycle(combined, combined_updated, tolerance=TOLERANCE, timestamp=None):
+    """
+    Log one cycle: the rows of combined_updated that are new or whose Score /
+    BoundaryScore moved more than tolerance from their last logged value. The
+    first tracked cycle also writes combined as baseline cycle 0. Everything is
+    computed before the first write; each cycle row is recorded before its
+    deltas, so an interrupted write only looks like a cycle with fewer changes.
+    Returns (cycle id, rows written).
+    """
+    timestamp = timestamp or pd.Timestamp.now().isoformat()
+    cycles = load_cycles()
+    if cycles.empty:
+        baseline = _log_rows(combined, 0)
+        latest, last_cycle = baseline[["Candidate"] + SCORE_COLS], 0
+    else:
+        baseline, last_cycle = None, int(cycles["CycleId"].iloc[-1])
+        latest = _load_latest(last_cycle)
+
+    cycle_id = last_cycle + 1
+    current = _log_rows(combined_updated, cycle_id)
+    delta, updated = _diff(latest, current, tolerance)
+
+    if baseline is not None:
+        _record_cycle(0, timestamp, len(baseline), len(baseline), tolerance)
+        if len(baseline):
+            io_utils.append_table(baseline, LOG_PATH)
+    _record_cycle(cycle_id, timestamp, len(current), len(delta), tolerance)
+    if len(delta):
+        io_utils.append_table(delta, LOG_PATH)
+    _save_latest(updated, cycle_id)
+    return cycle_id, len(delta)
+
+class _Replay:
+    """
+    Dense per-candidate arrays that the delta rows of cycle_ids are applied to
+    cycle by cycle, starting from initial (last logged values, or None).
+    """
+
+    def __init__(self, log, cycle_ids, initial=None):
+        initial = initial if initial is not None else log.iloc[:0]
+        self.candidates = np.unique(np.concatenate([initial["Candidate"].to_numpy(dtype=np.int64),
+                                                    log["Candidate"].to_numpy(dtype=np.int64)]))
+        self.ids = np.searchsorted(self.candidates, log["Candidate"].to_numpy(dtype=np.int64))
+        self.values = log[SCORE_COLS].to_numpy(dtype=np.float32)
+        self.present = np.zeros(len(self.candidates), dtype=bool)
+        self.state = np.full((len(self.candidates), len(SCORE_COLS)), np.nan, dtype=np.float32)
+        start = np.searchsorted(self.candidates, initial["Candidate"].to_numpy(dtype=np.int64))
+        self.state[start] = initial[SCORE_COLS].to_numpy(dtype=np.float32)
+        self.present[start] = True
+        self.cycle_ids = cycle_ids
+        log_cycles = log["CycleId"].to_numpy()
+        order = np.argsort(log_cycles, kind="stable")
+        bounds = np.flatnonzero(np.diff(log_cycles[order])) + 1
+        self.rows = {int(log_cycles[block[0]]): block for block in np.split(order, bounds) if len(block)}
+
+    def apply(self, cycle_id):
+        block = self.rows.get(cycle_id)
+        if block is not None:
+            self.state[self.ids[block]] = self.values[block]
+            self.present[self.ids[block]] = True
+
+    def snapshot(self):
+        out = pd.DataFrame({"Candidate": self.candidates[self.present]})
+        for i, col in enumerate(SCORE_COLS):
+            out[col] = self.state[self.present, i]
+        return out
+
+    def transitions(self):
+        """
+        Apply every cycle, yielding (cycle id, rows) with the previous/current
+        scores of each candidate that existed before the cycle, in the layout of
+        the former full tracking log (TRANSITION_COLUMNS, Cycle = id).
+        """
+        for cycle_id in self.cycle_ids:
+            present_before = self.present.copy()
+            prev = self.state[present_before].copy()
+            self.apply(cycle_id)
+            if cycle_id == 0:
+                continue
+            curr = self.state[present_before]
+            rows = pd.DataFrame({
+                "Candidate": self.candidates[present_before],
+                "Cycle": np.int32(cycle_id),
+                "Score_prev": prev[:, 0],
+                "BoundaryScore_prev": prev[:, 1],
+                "Score_curr": curr[:, 0],
+                "BoundaryScore_curr": curr[:, 1],
+            })
+            rows["Delta_Score"] = rows["Score_curr"] - rows["Score_prev"]
+            rows["Delta_Boundary"] = rows["BoundaryScore_curr"] - rows["BoundaryScore_prev"]
+            yield cycle_id, rows
+
+def replay_from(after=-1, latest=None):
+    """
+    Set up a replay of the cycles recorded after `after`. latest holds the last
+    logged values as of that cycle (a snapshot() of an earlier replay), so only
+    delta rows with a later CycleId are read; without it the replay has to
+    start from the beginning of the log.
+    """
+    if after >= 0 and latest is None:
+        raise ValueError(f"Replaying from cycle {after} needs the scores logged as of that cycle")
+    cycles = load_cycles()
+    cycle_ids = [cycle_id for cycle_id in cycles["CycleId"].astype(int).tolist() if cycle_id > after]
+    log = _compact(pd.DataFrame({"Candidate": []}), 0)
+    if cycle_ids and io_utils.table_exists(LOG_PATH):
+        # Only cycles present in the cycle table are replayed
+        blocks = [chunk[chunk["CycleId"].isin(cycle_ids)]
+                  for chunk in io_utils.iter_chunks(LOG_PATH, dtypes=LOG_DTYPES, min_values={"CycleId": after + 1})]
+        log = pd.concat([log] + blocks, ignore_index=True)
+    return _Replay(log, cycle_ids, latest)
+
+def iter_snapshots(cycle_ids=None):
+    """
+    Yield (cycle id, snapshot) in cycle order, where a snapshot holds the
+    Score/BoundaryScore of every candidate tracked so far as of that cycle.
+    cycle_ids limits which snapshots are yielded (all are replayed).
+    """
+    replay = replay_from()
+    wanted = None if cycle_ids is None else set(cycle_ids)
+    for cycle_id in replay.cycle_ids:
+        replay.apply(cycle_id)
+        if wanted is None or cycle_id in wanted:
+            yield cycle_id, replay.snapshot()
+
+def snapshot(cycle_id):
+    # Full snapshot as of one cycle (None when the cycle was never recorded)
+    return next((snap for _, snap in iter_snapshots([cycle_id])), None)
+
+def iter_transitions(after=-1, latest=None):
+    # Transition rows for every cycle later than `after` (see replay_from and _Replay.transitions)
+    yield from replay_from(after, latest).transitions()
+
+def last_cycle_id():
+    cycles = load_cycles()
+    return int(cycles["CycleId"].iloc[-1]) if len(cycles) else -1
+
+def _staging_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}.staging{ext}"
+
+def _publish(staged, path):
+    # Move a staged table (file or partitioned directory) over the live one
+    io_utils.drop_table(path)
+    if io_utils.table_exists(staged):
+        os.replace(io_utils.table_path(staged), io_utils.table_path(path))
+
+def migrate_legacy_log(legacy_path=LEGACY_LOG_PATH, tolerance=TOLERANCE):
+    """
+    Convert a full-row tracking log (one row per candidate per cycle, ISO
+    timestamp cycles) into the delta log once, when no delta log exists yet.
+    The tables are written to staging paths and only published once the whole
+    conversion succeeded, the cycle table last since it marks the log as
+    converted. The legacy table is left in place.
+    """
+    if io_utils.table_exists(CYCLES_PATH) or not io_utils.table_exists(legacy_path):
+        return
+    legacy = io_utils.load_table(legacy_path, columns=["Candidate", "Cycle", "Score_prev", "BoundaryScore_prev",
+                                                       "Score_curr", "BoundaryScore_curr"])
+    if legacy.empty:
+        return
+    print(f"📦 Converting {len(legacy)} legacy tracking rows to the delta log...")
+    staged = {path: _staging_path(path) for path in (LOG_PATH, LATEST_PATH, CYCLES_PATH)}
+    for path in staged.values():
+        io_utils.drop_table(path)  # left over from an interrupted conversion
+
+    groups = list(legacy.groupby("Cycle", sort=True))
+    # Older logs hold repeated rows per candidate (cross-joined duplicates)
+    first = groups[0][1].rename(columns={"Score_prev": "Score", "BoundaryScore_prev": "BoundaryScore"})
+    baseline = _log_rows(first, 0)
+    _record_cycle(0, groups[0][0], len(baseline), len(baseline), tolerance, staged[CYCLES_PATH])
+    io_utils.append_table(baseline, staged[LOG_PATH])
+    latest = baseline[["Candidate"] + SCORE_COLS]
+
+    for cycle_id, (timestamp, rows) in enumerate(groups, start=1):
+        current = rows.rename(columns={"Score_curr": "Score", "BoundaryScore_curr": "BoundaryScore"})
+        if cycle_id < len(groups):
+            # Candidates added in this cycle only show up (as _prev) in the next cycle's rows
+            added = groups[cycle_id][1].rename(columns={"Score_prev": "Score", "BoundaryScore_prev": "BoundaryScore"})
+            added = added[~added["Candidate"].isin(current["Candidate"])]
+            current = pd.concat([current, added], ignore_index=True)
+        current = _log_rows(current, cycle_id)
+        delta, latest = _diff(latest, current, tolerance)
+        _record_cycle(cycle_id, timestamp, len(current), len(delta), tolerance, staged[CYCLES_PATH])
+        if len(delta):
+            io_utils.append_table(delta, staged[LOG_PATH])
+    _save_latest(latest, len(groups), staged[LATEST_PATH])
+
+    for path in (LOG_PATH, LATEST_PATH, CYCLES_PATH):
+        _publish(staged[path], path)
+    print(f"📦 Delta log written: {len(groups)} cycles, {os.path.basename(io_utils.table_path(LOG_PATH))}.")
@@ -1,3 +1,12 @@
+import numpy as np
+import pandas as pd
+
+FEATURE_COLS = ["MotifSum", "Entropy", "HilbertMag", "BoundaryTransitionIndex"]
+
+# Normalized scoring weights (can be tuned), in FEATURE_COLS order.
+# The BoundaryTransitionIndex weight applies to the stability bonus (1 - |boundary|).
+DEFAULT_WEIGHTS = np.array([0.4, 0.25, 0.25, 0.10])
+
 def score_candidate(row):
     """
     Compute a weighted score for a given candidate row based on structural features.
@@ -8,18 +17,48 @@ def score_candidate(row):
     - Entropy: local/global signal coherence
     - HilbertMag: harmonic signal strength
     - BoundaryTransitionIndex: field transition behavior
+
+    Scored as a one-row score_matrix, so missing, None and NaN features all count as 0.
+    """
+    x = np.array([[row.get(col, 0) for col in FEATURE_COLS]], dtype=np.float64)
+    return float(score_matrix(x)[0])
+
+def score_matrix(X, weights=None):
+    """
+    Score a feature matrix in one pass.
+
+    X is an (n, 4) array with columns in FEATURE_COLS order. Missing values
+    (NaN/None) count as 0; score_candidate is this applied to a single row.
+    Returns a float64 array.
     """
+    w = DEFAULT_WEIGHTS if weights is None else np.asarray(weights, dtype=np.float64)
+    if w.shape != (len(FEATURE_COLS),):
+        raise ValueError(f"weights must have {len(FEATURE_COLS)} entries, got shape {w.shape}")
+
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(FEATURE_COLS):
+        raise ValueError(f"X must have shape (n, {len(FEATURE_COLS)}), got {X.shape}")
+    X = np.where(np.isnan(X), 0.0, X)
+
+    score = X[:, :3] @ w[:3]
+    score += w[3] * (1.0 - np.abs(X[:, 3]))  # stability bonus
+    return score
+
+def score_frame(df, weights=None):
+    """
+    Score every row of a DataFrame in one call.
+
+    Columns missing from df are treated as all-zero, like score_candidate does
+    for missing keys. weights may be an array in FEATURE_COLS order or a dict
+    keyed by feature name (unlisted features keep their default weight).
+    Returns a Series aligned to df.index.
+    """
+    if isinstance(weights, dict):
+        weights = [weights.get(col, w) for col, w in zip(FEATURE_COLS, DEFAULT_WEIGHTS)]
+
+    X = np.zeros((len(df), len(FEATURE_COLS)), dtype=np.float64)
+    for i, col in enumerate(FEATURE_COLS):
+        if col in df.columns:
+            X[:, i] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
 
-    motif = row.get("MotifSum", 0) or 0
-    entropy = row.get("Entropy", 0) or 0
-    hilbert = row.get("HilbertMag", 0) or 0
-    boundary = row.get("BoundaryTransitionIndex", 0) or 0
-
-    # Normalized scoring weights (can be tuned)
-    score = (
-        0.4 * motif +
-        0.25 * entropy +
-        0.25 * hilbert +
-        0.10 * (1.0 - abs(boundary))  # stability bonus
-    )
-    return score
\ No newline at end of file
+    return pd.Series(score_matrix(X, weights), index=df.index, name="Score")
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import time
+import numpy as np
+from engine import (io_utils, extrapolation, anchor_scheduler, features, prime_index, enrichment, model, novelty,
+                    instrumentation)
+from engine.instrumentation import stage
+
+SOCKET_PATH = "output/service/regina.sock"
+CHECKPOINT_EVERY = 10  # cycles between checkpoints
+CHECKPOINT_INTERVAL_S = 300  # and at most this long between a change and its checkpoint
+POLL_S = 1.0
+FALSE_ELITES_PATH = "data/init/false_elites.csv"
+
+# regina.py commands the service runs in-process (on the checkpointed data); they only read the refinement outputs
+SCRIPT_JOBS = ("project", "evolve", "animate")
+
+class ResidentState:
+    """
+    Everything an enrichment cycle needs, loaded once: the combined dataset, the
+    prime index, false elites, the boundary model, the anchor scheduler, the
+    novelty index and the feature cache. Cycles update it in memory;
+    checkpoint() writes it back to the files the standalone scripts use.
+    """
+
+    def __init__(self):
+        with stage("load") as s:
+            self.combined = io_utils.load_table(enrichment.COMBINED_PATH)
+            self.known_primes = prime_index.load_prime_index()
+            self.false_elites = io_utils.load_csv(FALSE_ELITES_PATH)
+            self.boundary_model = model.load_boundary_model()
+            self.scheduler = anchor_scheduler.AnchorScheduler.load()
+            self.novelty_index = novelty.load_novelty_index(self.combined)
+            self.feature_cache = features.FeatureCache.load()
+            s.rows = len(self.combined)
+        self.cycles_since_checkpoint = 0
+        self.dirty_since = None  # monotonic time of the first change not yet checkpointed
+
+    def run_cycle(self, n_samples=300, uniform_anchors=False, noise_features=False, min_distance=novelty.MIN_DISTANCE,
+                  full_retrain=False, seed=None):
+        # Same steps as run_enrichment_cycle.py, on the resident state; seed is an int or SeedSequence
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        weights_seed, draw_seed = seed.spawn(2)
+        with stage("anchor_selection") as s:
+            anchors = extrapolation.select_elite_anchors(self.combined, top_n=100)
+            anchor_weights = None if uniform_anchors else self.scheduler.weights(anchors, rng=weights_seed)
+            s.rows = len(anchors)
+        with stage("extrapolation") as s:
+            generated = extrapolation.extrapolate_candidates(anchors, n_samples=n_samples, rng=draw_seed,
+                                                             anchor_weights=anchor_weights)
+            s.rows = len(generated)
+        if not noise_features:
+            with stage("features") as s:
+                generated = features.featurize(generated, self.feature_cache)
+                s.rows = len(generated)
+        with stage("score") as s:
+            scored = extrapolation.score_and_filter_candidates(generated)
+            s.rows = len(scored)
+        self.scheduler.update_from_batch(generated, scored)
+        with stage("novelty") as s:
+            scored = self.novelty_index.filter(scored, min_distance)
+            s.rows = len(scored)
+        with stage("validation") as s:
+            labeled = extrapolation.label_candidates(scored, self.known_primes, self.false_elites)
+            s.rows = len(labeled)
+
+        rows_before = len(self.combined)
+        self.combined, self.boundary_model = enrichment.integrate_candidates(
+            self.combined, labeled, full_retrain=full_retrain, novelty_index=self.novelty_index,
+            boundary_model=self.boundary_model, persist=False,
+        )
+        self.cycles_since_checkpoint += 1
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+        return {"generated": len(generated), "passed": len(scored), "integrated": len(self.combined) - rows_before,
+                "rows": len(self.combined)}
+
+    def checkpoint_due(self):
+        return self.dirty_since is not None and (
+            self.cycles_since_checkpoint >= CHECKPOINT_EVERY or time.monotonic() - self.dirty_since >= CHECKPOINT_INTERVAL_S
+        )
+
+    def checkpoint(self):
+        # Written with the same helpers (and atomic table writes) as the standalone scripts
+        with stage("save", rows=len(self.combined)):
+            io_utils.save_table(self.combined, enrichment.COMBINED_PATH)
+            if self.boundary_model is not None:
+                model.save_boundary_model(self.boundary_model)
+            novelty.save_novelty_index(self.novelty_index)
+            self.scheduler.save()
+            self.feature_cache.save()
+        print(f"💾 Checkpoint: {len(self.combined)} rows after {self.cycles_since_checkpoint} cycles.")
+        self.cycles_since_checkpoint = 0
+        self.dirty_since = None
+
+class ReginaService:
+    """
+    Serves jobs from a Unix socket one at a time, against a single ResidentState.
+    Each request is one JSON line ({"job": ..., ...}) answered with one JSON line.
+    Every job is recorded as its own run manifest (service-<job>).
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.socket_path = socket_path
+        self.stopping = False
+        instrumentation.start_run("service-start")
+        self.state = ResidentState()
+        instrumentation.finish_run()
+
+    def handle(self, request):
+        job = request.get("job")
+        if job == "stop":
+            self.stopping = True
+            return {"status": "ok", "message": "stopping after checkpoint"}
+        if job == "status":
+            return {"status": "ok", "rows": len(self.state.combined), "pid": os.getpid(),
+                    "cycles_since_checkpoint": self.state.cycles_since_checkpoint}
+        if job not in ("cycle", "checkpoint") + SCRIPT_JOBS:
+            return {"status": "error", "message": f"unknown job {job!r}"}
+
+        runs = []
+        count = int(request.get("count", 1)) if job == "cycle" else 1
+        # A seeded request gives each of its cycles its own SeedSequence child
+        seeds = np.random.SeedSequence(request["seed"]).spawn(count) if request.get("seed") is not None else [None] * count
+        try:
+            for seed in seeds:
+                result = self._run_job(job, dict(request, seed=seed), runs)
+                if self.state.checkpoint_due():
+                    self._run_job("checkpoint", {}, runs)
+        except KeyboardInterrupt:
+            instrumentation.finish_run("failed")
+            raise
+        except BaseException as e:  # SystemExit from a script job must not stop the service
+            instrumentation.finish_run("failed")
+            print(f"⚠️ Job {job} failed: {e!r}")
+            return {"status": "error", "message": repr(e), "run_ids": runs}
+        return {"status": "ok", "run_ids": runs, "result": result}
+
+    def _run_job(self, job, request, runs):
+        """
+        Run one job as its own run manifest (its run_id is appended to runs).
+        Script jobs start their run themselves; it is finished here.
+        """
+        if job in SCRIPT_JOBS:
+            # They read the refinement outputs from disk, so bring those up to date first
+            if self.state.dirty_since is not None:
+                self._run_job("checkpoint", {}, runs)
+            import regina
+
+            argv = sys.argv
+            try:
+                regina.run(job, request.get("args", []))
+            finally:
+                sys.argv = argv
+            run = instrumentation.current_run()
+            if run is not None:
+                runs.append(run.run_id)
+                instrumentation.finish_run()
+            return None
+
+        run = instrumentation.start_run(f"service-{job}")
+        runs.append(run.run_id)
+        if job == "cycle":
+            params = {key: request[key] for key in ("n_samples", "uniform_anchors", "noise_features", "min_distance",
+                                                    "full_retrain", "seed") if key in request}
+            result = self.state.run_cycle(**params)
+            run.meta.update(result)
+        else:
+            result = self.state.checkpoint()
+        instrumentation.finish_run()
+        return result
+
+    def serve(self):
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if ping(self.socket_path):
+                raise RuntimeError(f"❌ A service is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # left behind by a service that did not shut down cleanly
+
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    request = json.loads(self.rfile.readline())
+                    response = service.handle(request)
+                except ValueError as e:
+                    response = {"status": "error", "message": f"bad request: {e}"}
+                self.wfile.write((json.dumps(response) + "\n").encode())
+
+        def request_stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        server = socketserver.UnixStreamServer(self.socket_path, Handler)
+        server.timeout = POLL_S
+        print(f"🛰️ Regina service listening on {self.socket_path} (pid {os.getpid()}).")
+        try:
+            while not self.stopping:
+                server.handle_request()
+                if self.state.checkpoint_due():
+                    self._run_job("checkpoint", {}, [])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.unlink(self.socket_path)
+            if self.state.dirty_since is not None:
+                self._run_job("checkpoint", {}, [])
+            print("👋 Regina service stopped.")
+
+def send(request, socket_path=SOCKET_PATH, timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode())
+        with client.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+def ping(socket_path=SOCKET_PATH):
+    try:
+        return send({"job": "status"}, socket_path, timeout=5)["status"] == "ok"
+    except OSError:
+        return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident worker keeping the dataset and model in memory between jobs.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser("start", help="load state and serve jobs until stopped")
+    cycle = subparsers.add_parser("cycle", help="run enrichment cycles in the service")
+    cycle.add_argument("--count", type=int, default=1, help="cycles to run back to back")
+    cycle.add_argument("--samples", type=int, default=300, help="candidates generated per cycle")
+    cycle.add_argument("--min-distance", type=float, default=novelty.MIN_DISTANCE, help="novelty filter distance (0 disables)")
+    cycle.add_argument("--uniform-anchors", action="store_true", help="sample anchors uniformly instead of by recorded yield")
+    cycle.add_argument("--noise-features", action="store_true", help="keep perturbed anchor features")
+    cycle.add_argument("--full-retrain", action="store_true", help="retrain the boundary model from scratch")
+    cycle.add_argument("--seed", type=int, default=None, help="base seed for anchor weights and candidate draws")
+    for job in SCRIPT_JOBS:
+        script = subparsers.add_parser(job, help=f"run `regina.py {job}` in the service")
+        script.add_argument("args", nargs=argparse.REMAINDER, help=f"arguments forwarded to {job}")
+    subparsers.add_parser("checkpoint", help="write the resident state to disk now")
+    subparsers.add_parser("status", help="show the service state")
+    subparsers.add_parser("stop", help="checkpoint and shut the service down")
+    args = parser.parse_args(argv)
+
+    if args.action == "start":
+        ReginaService(args.socket).serve()
+        return
+
+    if args.action == "cycle":
+        request = {"job": "cycle", "count": args.count, "n_samples": args.samples, "min_distance": args.min_distance,
+                   "uniform_anchors": args.uniform_anchors, "noise_features": args.noise_features,
+                   "full_retrain": args.full_retrain, "seed": args.seed}
+    elif args.action in SCRIPT_JOBS:
+        request = {"job": args.action, "args": args.args}
+    else:
+        request = {"job": args.action}
+    try:
+        response = send(request, args.socket)
+    except OSError as e:
+        sys.exit(f"❌ No service on {args.socket} ({e}). Start one with: python regina.py service start")
+    print(json.dumps(response, indent=4))
+    if response.get("status") != "ok":
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+import time
+import numpy as np
+from engine import io_utils, model, scoring, instrumentation
+from engine.instrumentation import stage
+
+CALIBRATION_PATH = "data/init/Calibration_Dataset.csv"
+OUTPUT_PATH = "output/refinement/streamed_scores.csv"
+CHUNK_SIZE = 250_000
+
+# Only these columns are read; everything else in the input stays on disk
+ID_COLUMNS = ["Candidate", "Number"]
+PASSTHROUGH_COLUMNS = ["FieldState", "PrimeStatus"]
+COMPACT_DTYPES = {
+    **{col: "float32" for col in scoring.FEATURE_COLS},
+    "FieldState": "category",
+    "PrimeStatus": "category",
+}
+
+def score_stream(in_path, out_path=OUTPUT_PATH, boundary_model=None, chunksize=CHUNK_SIZE, backend=None):
+    """
+    Score a calibration or candidate table chunk by chunk and write the results
+    incrementally, so memory stays bounded by chunksize rather than input size.
+
+    Each chunk carries its id, the scoring features (float32), FieldState/PrimeStatus
+    (categorical) when present, Score and, with a boundary model, BoundaryScore.
+    Boundary scores are looked up (read-only) in the BoundaryScoreCache written
+    by refine, so rows it already scored with the same model version are not
+    predicted again; the cache is neither grown nor saved here.
+    Output goes to a staging table that replaces out_path once every chunk is written.
+    Returns a summary dict with row/chunk counts and per-phase wall time.
+    """
+    available = io_utils.table_columns(in_path, backend)
+    columns = [col for col in ID_COLUMNS + scoring.FEATURE_COLS + PASSTHROUGH_COLUMNS if col in available]
+    dtypes = {col: dtype for col, dtype in COMPACT_DTYPES.items() if col in columns}
+    if boundary_model is not None and not set(model.FEATURES) <= set(columns):
+        raise ValueError(f"❌ {in_path} lacks the boundary model features: {sorted(set(model.FEATURES) - set(columns))}")
+
+    cache = model.BoundaryScoreCache.load(model.model_version(boundary_model)) if boundary_model is not None else None
+    staging = os.path.join(os.path.dirname(out_path), f".streaming_{os.path.basename(out_path)}")
+    io_utils.drop_table(staging, backend)
+
+    phases = {"load": 0.0, "score": 0.0, "apply": 0.0, "save": 0.0}
+    n_rows = n_chunks = 0
+    chunks = io_utils.iter_chunks(in_path, columns=columns, dtypes=dtypes, chunksize=chunksize, backend=backend)
+    while True:
+        t0 = time.perf_counter()
+        chunk = next(chunks, None)
+        t1 = time.perf_counter()
+        phases["load"] += t1 - t0
+        if chunk is None:
+            break
+
+        chunk["Score"] = scoring.score_frame(chunk).astype(np.float32)
+        t2 = time.perf_counter()
+        phases["score"] += t2 - t1
+
+        if boundary_model is not None:
+            chunk = model.apply_boundary_model(chunk, boundary_model, cache, update_cache=False)
+            chunk["BoundaryScore"] = chunk["BoundaryScore"].astype(np.float32)
+        t3 = time.perf_counter()
+        phases["apply"] += t3 - t2
+
+        io_utils.append_table(chunk, staging, backend)
+        phases["save"] += time.perf_counter() - t3
+
+        n_rows += len(chunk)
+        n_chunks += 1
+        print(f"🧮 Chunk {n_chunks}: {len(chunk)} rows scored ({n_rows} total).")
+
+    if n_chunks:
+        io_utils.drop_table(out_path, backend)
+        os.replace(io_utils.table_path(staging, backend), io_utils.table_path(out_path, backend))
+    else:
+        print(f"⚠️ {in_path} has no rows to score.")
+
+    return {"rows": n_rows, "chunks": n_chunks, "chunksize": chunksize, "columns_read": columns,
+            "phase_wall_s": {phase: round(seconds, 6) for phase, seconds in phases.items()}}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score (and boundary-score) a dataset in fixed-size chunks.")
+    parser.add_argument("input", nargs="?", default=CALIBRATION_PATH, help="calibration or candidate table")
+    parser.add_argument("output", nargs="?", default=OUTPUT_PATH, help="logical output table path")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--no-boundary", action="store_true", help="skip the boundary model (Score only)")
+    args = parser.parse_args(argv)
+
+    run = instrumentation.start_run("score-stream")
+    boundary_model = None
+    if not args.no_boundary:
+        with stage("load"):
+            boundary_model = model.load_boundary_model()
+        if boundary_model is None:
+            print("⚠️ No saved boundary model found. Writing Score only.")
+
+    with stage("score") as s:
+        summary = score_stream(args.input, args.output, boundary_model, chunksize=args.chunksize)
+        s.rows = summary["rows"]
+        s.meta.update(summary)
+    run.meta.update(input=args.input, output=io_utils.table_path(args.output))
+
+    print(f"✅ Streamed scoring complete: {summary['rows']} rows in {summary['chunks']} chunks -> {io_utils.table_path(args.output)}")
+    instrumentation.finish_run()
+
+if __name__ == "__main__":
+    main()
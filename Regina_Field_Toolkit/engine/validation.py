@@ -1,4 +1,10 @@
+import numpy as np
+
 def validate_candidates(candidates, known_primes, false_elites):
-    candidates["IsPrime"] = candidates["Candidate"].isin(known_primes)
+    # known_primes may be a PrimeIndex (vectorized bitset lookup) or any collection accepted by isin
+    if hasattr(known_primes, "contains"):
+        candidates["IsPrime"] = known_primes.contains(candidates["Candidate"].to_numpy(dtype=np.int64))
+    else:
+        candidates["IsPrime"] = candidates["Candidate"].isin(known_primes)
     candidates["IsFalseElite"] = candidates["Candidate"].isin(false_elites)
     return candidates
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Unified command line entry point for the Regina Field Toolkit.
+
+    python regina.py [--profile] <command> [args...]
+
+Each command runs one pipeline stage in-process. Nothing beyond the standard
+library is imported until a command is chosen, so every subcommand pays only
+for the modules its own stage uses. Run from the toolkit directory, like the
+individual scripts (data and output paths are relative to it). Every stage
+writes a run manifest to output/runs/; --profile adds a cProfile dump next to it.
+"""
+import argparse
+import os
+import runpy
+import sys
+
+TOOLKIT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# command -> (script file or "module:" target, help text)
+COMMANDS = {
+    "refine": ("data_refinement_engine.py", "score calibration primes and false elites, train the boundary model"),
+    "extrapolate": ("run_extrapolation_cycle.py", "generate, score and label extrapolated candidates"),
+    "enrich": ("run_enrichment_cycle.py", "run one enrichment cycle (extrapolate, integrate, update model)"),
+    "enrich-parallel": ("run_parallel_enrichment.py", "run independent enrichment chains across a process pool"),
+    "project": ("regina_projection_pipeline.py", "PCA/UMAP projection and plots"),
+    "animate": ("generate_projection_animation.py", "animate projections across refinement cycles"),
+    "evolve": ("analyze_score_evolution.py", "score evolution analytics from the tracking log"),
+    "score-stream": ("module:engine.streaming", "score and boundary-score a large table in fixed-size chunks"),
+    "prime-types": ("module:engine.scoring_by_prime_type", "tag and score calibration numbers by prime type"),
+    "service": ("module:engine.service", "resident worker: keep data and model in memory and serve cycle/projection/analytics jobs"),
+    "bench": ("module:benchmarks.run_benchmarks", "benchmark hot paths on synthetic data and compare to a baseline"),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="regina", description="Regina Field Toolkit pipeline runner.")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile dump alongside the run manifest")
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        # Everything after the command (including -h) is forwarded untouched to the stage
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+def run(command, args):
+    target, _ = COMMANDS[command]
+    if TOOLKIT_DIR not in sys.path:
+        sys.path.insert(0, TOOLKIT_DIR)
+
+    if target.startswith("module:"):
+        module = target[len("module:"):]
+        sys.argv = [module] + list(args)
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    else:
+        script = os.path.join(TOOLKIT_DIR, target)
+        sys.argv = [script] + list(args)
+        runpy.run_path(script, run_name="__main__")
+
+def main(argv=None):
+    parsed, stage_args = build_parser().parse_known_args(argv)
+    if parsed.profile:
+        os.environ["REGINA_PROFILE"] = "1"
+    run(parsed.command, stage_args)
+
+if __name__ == "__main__":
+    main()
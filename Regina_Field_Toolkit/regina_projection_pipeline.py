@@ -4,168 +4,173 @@ import os
 import sys
 import json
 from datetime import datetime
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-try:
-    import umap
-except ImportError:
-    umap = None
+import importlib.util
+from engine import projection, projection_plots, score_evolution, instrumentation
+from engine.instrumentation import stage
+
+# UMAP (and numba behind it) is only imported when a fit or transform needs it
+UMAP_AVAILABLE = importlib.util.find_spec("umap") is not None
+if not UMAP_AVAILABLE:
     print("⚠️ UMAP module not found. Skipping UMAP projection.")
 
 # === Configuration ===
 DEFAULT_INPUT_CSV = "data/init/Calibration_Dataset.csv"
 PLOT = True  # Set to False to disable plot generation
+PLOT_WORKERS = None  # processes rendering figures concurrently (None: one per CPU, 1: render inline)
+LANDMARK_FRACTION = projection.LANDMARK_FRACTION  # share of rows (balanced by PrimeStatus) the models are fitted on in landmark mode
+PROJECTION_WORKERS = None  # processes transforming non-landmark rows (None: one per CPU, 1: inline)
+
+if __name__ == "__main__":
+    # === Step 1: Parse input arguments ===
+    REFIT = "--refit" in sys.argv  # Default: reuse saved scaler/PCA/UMAP models when the settings match
+    # Figures are density-binned above projection_plots.DENSITY_THRESHOLD rows; --density / --scatter force a mode
+    PLOT_MODE = "density" if "--density" in sys.argv else "scatter" if "--scatter" in sys.argv else "auto"
+    # Landmark fitting is automatic above projection.LANDMARK_THRESHOLD rows; --landmarks / --full-fit force a mode
+    LANDMARKS = True if "--landmarks" in sys.argv else False if "--full-fit" in sys.argv else None
+    INCREMENTAL_PCA = "--incremental-pca" in sys.argv  # IncrementalPCA over all rows instead of PCA on the fit rows
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    input_csv = args[0] if args else DEFAULT_INPUT_CSV
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run = instrumentation.start_run("project")
+
+    output_dir = "output/projection"
+    os.makedirs(output_dir, exist_ok=True)
+
+    output_csv = os.path.join(output_dir, f"regina_field_projection_output_{timestamp}.csv")
+    pca_plot_file = os.path.join(output_dir, f"pca_projection_plot_{timestamp}.png")
+    umap_plot_file = os.path.join(output_dir, f"umap_projection_plot_{timestamp}.png")
+    pca_score_plot = os.path.join(output_dir, f"pca_score_heatmap_{timestamp}.png")
+    umap_score_plot = os.path.join(output_dir, f"umap_score_heatmap_{timestamp}.png")
+    metadata_path = os.path.join(output_dir, f"metadata_{timestamp}.json")
+
+    # === Step 2: Load data ===
+    with stage("load") as s:
+        df = pd.read_csv(input_csv)
+        s.rows = len(df)
+
+    # === Step 3: Select features ===
+    feature_cols = [
+        "MotifSum",
+        "Entropy",
+        "HilbertMag",
+        "CompositeScore",
+        "EnhancedCompositeScore",
+        "RhythmicCompositeScore",
+        "BoundaryTransitionIndex"
+    ]
+
+    X = df[feature_cols].dropna()
+
+    # === Steps 4-6: Standardize, PCA, UMAP (saved models are reused; new rows go through transform) ===
+    with stage("projection", rows=len(X)) as s:
+        strata = df.loc[X.index, "PrimeStatus"].to_numpy() if "PrimeStatus" in df.columns else None
+        pca_proj, umap_proj, projection_info = projection.project_features(
+            X, feature_cols, use_umap=UMAP_AVAILABLE, refit=REFIT, strata=strata, landmarks=LANDMARKS,
+            landmark_fraction=LANDMARK_FRACTION, incremental_pca=INCREMENTAL_PCA, workers=PROJECTION_WORKERS
+        )
+        s.meta["mode"] = projection_info["mode"]
+        s.meta["phase_wall_s"] = projection_info["phase_wall_s"]
+
+    if "PCA_X" not in df.columns or "PCA_Y" not in df.columns:
+        df["PCA_X"] = np.nan
+        df["PCA_Y"] = np.nan
+        df.loc[X.index, "PCA_X"] = pca_proj[:, 0]
+        df.loc[X.index, "PCA_Y"] = pca_proj[:, 1]
+    else:
+        print("ℹ️ PCA projection already present — skipping PCA calculation.")
 
-# === Step 1: Parse input arguments ===
-input_csv = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_INPUT_CSV
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-output_dir = "output/projection"
-os.makedirs(output_dir, exist_ok=True)
-
-output_csv = os.path.join(output_dir, f"regina_field_projection_output_{timestamp}.csv")
-pca_plot_file = os.path.join(output_dir, f"pca_projection_plot_{timestamp}.png")
-umap_plot_file = os.path.join(output_dir, f"umap_projection_plot_{timestamp}.png")
-pca_score_plot = os.path.join(output_dir, f"pca_score_heatmap_{timestamp}.png")
-umap_score_plot = os.path.join(output_dir, f"umap_score_heatmap_{timestamp}.png")
-metadata_path = os.path.join(output_dir, f"metadata_{timestamp}.json")
-
-# === Step 2: Load data ===
-df = pd.read_csv(input_csv)
-
-# === Step 3: Select features ===
-feature_cols = [
-    "MotifSum",
-    "Entropy",
-    "HilbertMag",
-    "CompositeScore",
-    "EnhancedCompositeScore",
-    "RhythmicCompositeScore",
-    "BoundaryTransitionIndex"
-]
-
-X = df[feature_cols].dropna()
-
-# === Step 4: Standardize ===
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# === Step 5: PCA ===
-if "PCA_X" not in df.columns or "PCA_Y" not in df.columns:
-    pca = PCA(n_components=2, random_state=42)
-    pca_proj = pca.fit_transform(X_scaled)
-    df["PCA_X"] = np.nan
-    df["PCA_Y"] = np.nan
-    df.loc[X.index, "PCA_X"] = pca_proj[:, 0]
-    df.loc[X.index, "PCA_Y"] = pca_proj[:, 1]
-else:
-    print("ℹ️ PCA projection already present — skipping PCA calculation.")
-
-# === Step 6: UMAP ===
-if umap is not None:
-    reducer = umap.UMAP(n_neighbors=15, min_dist=0.1, metric="euclidean", random_state=42)
-    umap_proj = reducer.fit_transform(X_scaled)
-    df["UMAP_X"] = np.nan
-    df["UMAP_Y"] = np.nan
-    df.loc[X.index, "UMAP_X"] = umap_proj[:, 0]
-    df.loc[X.index, "UMAP_Y"] = umap_proj[:, 1]
-else:
     df["UMAP_X"] = np.nan
     df["UMAP_Y"] = np.nan
-
-# === Step 7: Save output CSV ===
-df.to_csv(output_csv, index=False)
-print(f"✅ Projections saved: {output_csv}")
-
-# === Step 8: Plotting ===
-def plot_projection(x, y, title, out_file, color_col="PrimeStatus", cmap=None):
-    plt.figure(figsize=(8, 6))
-    sns.scatterplot(data=df, x=x, y=y, hue=color_col, palette=cmap, alpha=0.7, s=20)
-    plt.title(title)
-    plt.legend(loc="best")
-    plt.tight_layout()
-    plt.savefig(out_file)
-    plt.close()
-    print(f"🖼️ Plot saved: {out_file}")
-
-def plot_heatmap(x, y, color_metric, title, out_file):
-    plt.figure(figsize=(8, 6))
-    scatter = plt.scatter(df[x], df[y], c=df[color_metric], cmap="viridis", alpha=0.8, s=20)
-    plt.title(title)
-    plt.colorbar(scatter, label=color_metric)
-    plt.tight_layout()
-    plt.savefig(out_file)
-    plt.close()
-    print(f"🌡️ Heatmap saved: {out_file}")
-
-if PLOT:
-    plot_projection("PCA_X", "PCA_Y", "PCA Projection of Regina Field", pca_plot_file)
-    if umap is not None:
-        plot_projection("UMAP_X", "UMAP_Y", "UMAP Projection of Regina Field", umap_plot_file)
-    if "Score" in df.columns:
-        plot_heatmap("PCA_X", "PCA_Y", "Score", "PCA: Structural Score Heatmap", pca_score_plot)
-        if umap is not None:
-            plot_heatmap("UMAP_X", "UMAP_Y", "Score", "UMAP: Structural Score Heatmap", umap_score_plot)
-
-# === Step 9: Save metadata JSON ===
-metadata = {
-    "timestamp": timestamp,
-    "input_csv": input_csv,
-    "output_csv": output_csv,
-    "pca_plot_file": pca_plot_file if PLOT else None,
-    "umap_plot_file": umap_plot_file if PLOT and umap is not None else None,
-    "pca_score_heatmap": pca_score_plot if PLOT else None,
-    "umap_score_heatmap": umap_score_plot if PLOT and umap is not None else None,
-    "features_used": feature_cols,
-    "rows_input": len(df),
-    "rows_projected": len(X),
-    "projection_settings": {
-        "pca_components": 2,
-        "umap_enabled": umap is not None,
-        "umap_n_neighbors": 15,
-        "umap_min_dist": 0.1,
-        "umap_metric": "euclidean"
+    if umap_proj is not None:
+        df.loc[X.index, "UMAP_X"] = umap_proj[:, 0]
+        df.loc[X.index, "UMAP_Y"] = umap_proj[:, 1]
+
+    # === Step 7: Save output CSV ===
+    with stage("save", rows=len(df)):
+        df.to_csv(output_csv, index=False)
+    print(f"✅ Projections saved: {output_csv}")
+
+    # === Step 8: Plotting ===
+    density = projection_plots.use_density(len(df), PLOT_MODE)
+    pca_vol_file = os.path.join(output_dir, f"pca_volatility_overlay_{timestamp}.png")
+    umap_vol_file = os.path.join(output_dir, f"umap_volatility_overlay_{timestamp}.png")
+    rendered = []
+    if PLOT:
+        # Volatility overlay (plot-only: the tracking log is skipped when PLOT is off)
+        try:
+            # Per-candidate Score std across cycles from the state saved by `evolve` (read only; run evolve to refresh it)
+            evolution_state, _ = score_evolution.load_state()
+            if evolution_state is None:
+                print("ℹ️ No score evolution state yet (run evolve first). Skipping the volatility overlay.")
+            else:
+                volatility_map = (
+                    score_evolution.summarize(evolution_state)[["Candidate", "Score_curr_std"]]
+                    .rename(columns={"Score_curr_std": "Volatility"})
+                )
+                df = df.merge(volatility_map, on="Candidate", how="left")
+        except Exception as e:
+            print(f"⚠️ Volatility overlay failed: {e}")
+
+        # Every figure is independent: collect them and render them side by side in worker processes,
+        # each receiving only the columns it draws
+        figures = []
+        def add_figure(plot, columns, **kwargs):
+            figures.append((plot, dict(data=df[list(dict.fromkeys(columns))], density=density, **kwargs)))
+
+        add_figure(projection_plots.plot_projection, ["PCA_X", "PCA_Y", "PrimeStatus"],
+                   x="PCA_X", y="PCA_Y", title="PCA Projection of Regina Field", out_file=pca_plot_file)
+        if UMAP_AVAILABLE:
+            add_figure(projection_plots.plot_projection, ["UMAP_X", "UMAP_Y", "PrimeStatus"],
+                       x="UMAP_X", y="UMAP_Y", title="UMAP Projection of Regina Field", out_file=umap_plot_file)
+        if "Score" in df.columns:
+            add_figure(projection_plots.plot_heatmap, ["PCA_X", "PCA_Y", "Score"],
+                       x="PCA_X", y="PCA_Y", color_metric="Score", title="PCA: Structural Score Heatmap", out_file=pca_score_plot)
+            if UMAP_AVAILABLE:
+                add_figure(projection_plots.plot_heatmap, ["UMAP_X", "UMAP_Y", "Score"],
+                           x="UMAP_X", y="UMAP_Y", color_metric="Score", title="UMAP: Structural Score Heatmap", out_file=umap_score_plot)
+            if "Volatility" in df.columns:
+                add_figure(projection_plots.plot_volatility_overlay, ["PCA_X", "PCA_Y", "Score", "Volatility"],
+                           x="PCA_X", y="PCA_Y", score_col="Score", size_col="Volatility",
+                           title="PCA Score & Volatility", out_file=pca_vol_file)
+                if UMAP_AVAILABLE:
+                    add_figure(projection_plots.plot_volatility_overlay, ["UMAP_X", "UMAP_Y", "Score", "Volatility"],
+                               x="UMAP_X", y="UMAP_Y", score_col="Score", size_col="Volatility",
+                               title="UMAP Score & Volatility", out_file=umap_vol_file)
+
+        with stage("plot", rows=len(df)) as s:
+            rendered = projection_plots.render_figures(figures, PLOT_WORKERS)
+            s.meta.update(mode="density" if density else "scatter", figures=len(figures), rendered=len(rendered))
+
+    # === Step 9: Save metadata JSON ===
+    metadata = {
+        "timestamp": timestamp,
+        "input_csv": input_csv,
+        "output_csv": output_csv,
+        "pca_plot_file": pca_plot_file if pca_plot_file in rendered else None,
+        "umap_plot_file": umap_plot_file if umap_plot_file in rendered else None,
+        "pca_score_heatmap": pca_score_plot if pca_score_plot in rendered else None,
+        "umap_score_heatmap": umap_score_plot if umap_score_plot in rendered else None,
+        "pca_volatility_overlay": pca_vol_file if pca_vol_file in rendered else None,
+        "umap_volatility_overlay": umap_vol_file if umap_vol_file in rendered else None,
+        "plot_mode": ("density" if density else "scatter") if PLOT else None,
+        "features_used": feature_cols,
+        "rows_input": len(df),
+        "rows_projected": len(X),
+        "projection_settings": {
+            "pca_components": projection.PROJECTION_SETTINGS["pca_components"],
+            "umap_enabled": UMAP_AVAILABLE,
+            "umap_n_neighbors": projection.PROJECTION_SETTINGS["umap_n_neighbors"],
+            "umap_min_dist": projection.PROJECTION_SETTINGS["umap_min_dist"],
+            "umap_metric": projection.PROJECTION_SETTINGS["umap_metric"],
+            "random_state": projection.PROJECTION_SETTINGS["random_state"],
+            "landmark_fraction": projection_info.get("landmark_fraction"),
+            "incremental_pca": INCREMENTAL_PCA
+        },
+        "projection_models": projection_info,
+        "run_id": run.run_id
     }
-}
-
-with open(metadata_path, "w") as f:
-    json.dump(metadata, f, indent=4)
-
-print(f"📝 Metadata log saved: {metadata_path}")
-
-# === Volatility Overlay ===
-try:
-    volatility_log = pd.read_csv("output/refinement/score_tracking_log.csv")
-    volatility_map = (
-        volatility_log.groupby("Candidate")["Score_curr"].std().reset_index().rename(columns={"Score_curr": "Volatility"})
-    )
-    df = df.merge(volatility_map, on="Candidate", how="left")
-
-    def plot_volatility_overlay(x, y, score_col, size_col, title, out_file):
-        plt.figure(figsize=(8, 6))
-        sns.scatterplot(
-            data=df, x=x, y=y,
-            hue=score_col,
-            size=size_col,
-            sizes=(10, 200),
-            palette="viridis",
-            alpha=0.7,
-            legend="brief"
-        )
-        plt.title(title)
-        plt.tight_layout()
-        plt.savefig(out_file)
-        plt.close()
-        print(f"🌀 Volatility overlay saved: {out_file}")
-
-    if PLOT and "Volatility" in df.columns:
-        pca_vol_file = os.path.join(output_dir, f"pca_volatility_overlay_{timestamp}.png")
-        umap_vol_file = os.path.join(output_dir, f"umap_volatility_overlay_{timestamp}.png")
-        plot_volatility_overlay("PCA_X", "PCA_Y", "Score", "Volatility", "PCA Score & Volatility", pca_vol_file)
-        if umap is not None:
-            plot_volatility_overlay("UMAP_X", "UMAP_Y", "Score", "Volatility", "UMAP Score & Volatility", umap_vol_file)
-except Exception as e:
-    print(f"⚠️ Volatility overlay failed: {e}")
\ No newline at end of file
+
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=4)
+
+    print(f"📝 Metadata log saved: {metadata_path}")
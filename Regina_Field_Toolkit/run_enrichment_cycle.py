@@ -1,56 +1,52 @@
-import pandas as pd
-from pathlib import Path
-from engine import io_utils, extrapolation, model, scoring
+import sys
+import numpy as np
+from engine import io_utils, extrapolation, anchor_scheduler, features, prime_index, enrichment, novelty, instrumentation
+from engine.instrumentation import stage
+
+# === Configuration ===
+FULL_RETRAIN = "--full-retrain" in sys.argv  # Default: warm-start the saved boundary model
+UNIFORM_ANCHORS = "--uniform-anchors" in sys.argv  # Default: sample anchors by their recorded yield
+NOISE_FEATURES = "--noise-features" in sys.argv  # Default: compute features from each candidate integer
+SEED = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else None  # Default: fresh entropy
+NOVELTY_DISTANCE = novelty.MIN_DISTANCE  # Standardized feature distance to existing points; 0 keeps everything
+instrumentation.start_run("enrich")  # Manifest in output/runs/; set REGINA_PROFILE=1 for a cProfile dump
 
 # === Load Data ===
-combined_path = "output/refinement/combined_with_boundary.csv"
-log_path = "output/refinement/score_tracking_log.csv"
-
-combined = io_utils.load_csv(combined_path)
-known_primes = io_utils.load_csv("data/init/known_primes_up_to_10_million.csv")
-false_elites = io_utils.load_csv("data/init/false_elites.csv")
+with stage("load") as s:
+    combined = io_utils.load_table(enrichment.COMBINED_PATH)
+    known_primes = prime_index.load_prime_index()
+    false_elites = io_utils.load_csv("data/init/false_elites.csv")
+    s.rows = len(combined)
 
 # === Step 1: Extrapolate ===
-anchors = extrapolation.select_elite_anchors(combined, top_n=100)
-generated = extrapolation.extrapolate_candidates(anchors, n_samples=300)
-scored = extrapolation.score_and_filter_candidates(generated)
-labeled = extrapolation.label_candidates(scored, known_primes, false_elites)
-
-# === Step 2: Integrate New Candidates ===
-existing_ids = set(combined["Candidate"])
-new_valid = labeled[~labeled["Candidate"].isin(existing_ids)]
-
-if not new_valid.empty:
-    print(f"🧬 {len(new_valid)} new extrapolated candidates identified. Updating model...")
-    combined_updated = pd.concat([combined, new_valid], ignore_index=True)
-
-    # Retrain and apply model
-    boundary_model = model.train_boundary_model(combined_updated)
-    combined_updated = model.apply_boundary_model(combined_updated, boundary_model)
-
-    # Save full updated dataset
-    io_utils.save_csv(combined_updated, combined_path)
-    io_utils.save_csv(new_valid, "output/refinement/newly_integrated_candidates.csv")
-
-    # === Score Tracking ===
-    try:
-        previous_scores = combined[["Candidate", "Score", "BoundaryScore"]].copy()
-        current_scores = combined_updated[["Candidate", "Score", "BoundaryScore"]].copy()
-
-        merged = previous_scores.merge(current_scores, on="Candidate", suffixes=("_prev", "_curr"))
-        merged["Delta_Score"] = merged["Score_curr"] - merged["Score_prev"]
-        merged["Delta_Boundary"] = merged["BoundaryScore_curr"] - merged["BoundaryScore_prev"]
-        merged["Cycle"] = pd.Timestamp.now().isoformat()
-
-        if Path(log_path).exists():
-            existing_log = pd.read_csv(log_path)
-            merged = pd.concat([existing_log, merged], ignore_index=True)
-
-        io_utils.save_csv(merged, log_path)
-        print("📊 Score evolution logged.")
-    except Exception as e:
-        print(f"⚠️ Score tracking failed: {e}")
-
-    print("✅ Enrichment cycle complete. Boundary model updated.")
-else:
-    print("🔁 No new candidates passed filtering. No retraining necessary.")
\ No newline at end of file
+with stage("anchor_selection") as s:
+    anchors = extrapolation.select_elite_anchors(combined, top_n=100)
+    scheduler = anchor_scheduler.AnchorScheduler.load()
+    weights_seed, draw_seed = np.random.SeedSequence(SEED).spawn(2)  # anchor weights and candidate draws
+    anchor_weights = None if UNIFORM_ANCHORS else scheduler.weights(anchors, rng=weights_seed)
+    s.rows = len(anchors)
+with stage("extrapolation") as s:
+    generated = extrapolation.extrapolate_candidates(anchors, n_samples=300, rng=draw_seed, anchor_weights=anchor_weights)
+    s.rows = len(generated)
+if not NOISE_FEATURES:
+    with stage("features") as s:
+        feature_cache = features.FeatureCache.load()
+        generated = features.featurize(generated, feature_cache)
+        feature_cache.save()
+        s.rows = len(generated)
+with stage("score") as s:
+    scored = extrapolation.score_and_filter_candidates(generated)
+    s.rows = len(scored)
+scheduler.update_from_batch(generated, scored)
+scheduler.save()
+print(f"🎯 {len(scored)} of {len(generated)} generated candidates passed the score threshold.")
+with stage("novelty") as s:
+    novelty_index = novelty.load_novelty_index(combined)
+    scored = novelty_index.filter(scored, NOVELTY_DISTANCE)
+    s.rows = len(scored)
+with stage("validation") as s:
+    labeled = extrapolation.label_candidates(scored, known_primes, false_elites)
+    s.rows = len(labeled)
+
+# === Step 2: Integrate New Candidates, Update Model, Track Scores ===
+enrichment.integrate_candidates(combined, labeled, full_retrain=FULL_RETRAIN, novelty_index=novelty_index)
\ No newline at end of file
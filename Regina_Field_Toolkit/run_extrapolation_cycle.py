@@ -1,23 +1,56 @@
+import sys
+import numpy as np
 import pandas as pd
-from engine import io_utils, extrapolation
+from engine import io_utils, extrapolation, anchor_scheduler, features, prime_index, instrumentation
+from engine.instrumentation import stage
+
+UNIFORM_ANCHORS = "--uniform-anchors" in sys.argv  # Default: sample anchors by their recorded yield
+NOISE_FEATURES = "--noise-features" in sys.argv  # Default: compute features from each candidate integer
+SEED = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else None  # Default: fresh entropy
+instrumentation.start_run("extrapolate")
 
 # Load scored + boundary-labeled primes
-df = io_utils.load_csv("output/refinement/combined_with_boundary.csv")
-known_primes = io_utils.load_csv("data/init/known_primes_up_to_10_million.csv")
-false_elites = io_utils.load_csv("data/init/false_elites.csv")
+with stage("load") as s:
+    df = io_utils.load_table("output/refinement/combined_with_boundary.csv")
+    known_primes = prime_index.load_prime_index()
+    false_elites = io_utils.load_csv("data/init/false_elites.csv")
+    s.rows = len(df)
 
 # Select elite anchors
-anchors = extrapolation.select_elite_anchors(df, top_n=100)
+with stage("anchor_selection") as s:
+    anchors = extrapolation.select_elite_anchors(df, top_n=100)
+    scheduler = anchor_scheduler.AnchorScheduler.load()
+    weights_seed, draw_seed = np.random.SeedSequence(SEED).spawn(2)  # anchor weights and candidate draws
+    anchor_weights = None if UNIFORM_ANCHORS else scheduler.weights(anchors, rng=weights_seed)
+    s.rows = len(anchors)
 
 # Extrapolate new candidates
-generated = extrapolation.extrapolate_candidates(anchors, n_samples=300)
+with stage("extrapolation") as s:
+    generated = extrapolation.extrapolate_candidates(anchors, n_samples=300, rng=draw_seed, anchor_weights=anchor_weights)
+    s.rows = len(generated)
+
+# Replace the perturbed anchor features with features computed from each candidate integer
+if not NOISE_FEATURES:
+    with stage("features") as s:
+        feature_cache = features.FeatureCache.load()
+        generated = features.featurize(generated, feature_cache)
+        feature_cache.save()
+        s.rows = len(generated)
 
 # Score and filter them
-scored = extrapolation.score_and_filter_candidates(generated)
+with stage("score") as s:
+    scored = extrapolation.score_and_filter_candidates(generated)
+    s.rows = len(scored)
+scheduler.update_from_batch(generated, scored)
+scheduler.save()
+print(f"🎯 {len(scored)} of {len(generated)} generated candidates passed the score threshold.")
 
 # Validate
-labeled = extrapolation.label_candidates(scored, known_primes, false_elites)
+with stage("validation") as s:
+    labeled = extrapolation.label_candidates(scored, known_primes, false_elites)
+    s.rows = len(labeled)
 
 # Save output
-io_utils.save_csv(labeled, "output/refinement/extrapolated_candidates.csv")
+with stage("save", rows=len(labeled)):
+    io_utils.save_table(labeled, "output/refinement/extrapolated_candidates.csv")
 print("✅ Extrapolation cycle complete. Results saved.")
\ No newline at end of file
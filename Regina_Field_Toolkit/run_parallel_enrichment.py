@@ -0,0 +1,62 @@
+import argparse
+import os
+import numpy as np
+from engine import io_utils, extrapolation, anchor_scheduler, features, prime_index, enrichment, novelty, instrumentation
+from engine.instrumentation import stage
+
+# === Parse input arguments ===
+parser = argparse.ArgumentParser(description="Run independent extrapolation chains in parallel, then update the model once.")
+parser.add_argument("--chains", type=int, default=os.cpu_count(), help="number of extrapolation chains (default: CPU count)")
+parser.add_argument("--samples", type=int, default=300, help="candidates generated per chain")
+parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+parser.add_argument("--seed", type=int, default=None, help="base seed for the per-chain RNG streams")
+parser.add_argument("--min-distance", type=float, default=novelty.MIN_DISTANCE,
+                    help="drop candidates within this standardized feature distance of existing points (0 disables)")
+parser.add_argument("--uniform-anchors", action="store_true", help="sample anchors uniformly instead of by recorded yield")
+parser.add_argument("--noise-features", action="store_true",
+                    help="keep the anchors' perturbed features instead of computing them from each candidate integer")
+parser.add_argument("--full-retrain", action="store_true", help="retrain the boundary model from scratch")
+args = parser.parse_args()
+run = instrumentation.start_run("enrich-parallel")
+run.meta.update(chains=args.chains, samples=args.samples, workers=args.workers, seed=args.seed)
+
+# === Load Data ===
+with stage("load") as s:
+    combined = io_utils.load_table(enrichment.COMBINED_PATH)
+    known_primes = prime_index.load_prime_index()
+    false_elites = io_utils.load_csv("data/init/false_elites.csv")
+    s.rows = len(combined)
+
+# === Step 1: Extrapolate across chains ===
+with stage("anchor_selection") as s:
+    anchors = extrapolation.select_elite_anchors(combined, top_n=100)
+    scheduler = anchor_scheduler.AnchorScheduler.load()
+    # The Thompson draw gets the SeedSequence child after the chains' ones, so --seed fixes it too
+    weights_seed = np.random.SeedSequence(args.seed).spawn(args.chains + 1)[-1]
+    anchor_weights = None if args.uniform_anchors else scheduler.weights(anchors, rng=weights_seed)
+    s.rows = len(anchors)
+# Chains extrapolate and score in worker processes; their CPU shows up as children_cpu_s in the manifest
+with stage("extrapolation") as s:
+    feature_cache = None if args.noise_features else features.FeatureCache.load()
+    scored, draws, accepted = extrapolation.run_parallel_chains(
+        anchors, args.chains, n_samples=args.samples, seed=args.seed, max_workers=args.workers, anchor_weights=anchor_weights,
+        real_features=not args.noise_features, feature_cache=feature_cache,
+    )
+    s.rows = len(scored)
+if feature_cache is not None:
+    with stage("save"):
+        feature_cache.save()
+scheduler.update(draws, accepted)
+scheduler.save()
+print(f"⛓️ {args.chains} chains produced {len(scored)} unique candidates above threshold "
+      f"({int(accepted.sum())} of {int(draws.sum())} draws accepted).")
+with stage("novelty") as s:
+    novelty_index = novelty.load_novelty_index(combined)
+    scored = novelty_index.filter(scored, args.min_distance)
+    s.rows = len(scored)
+with stage("validation") as s:
+    labeled = extrapolation.label_candidates(scored, known_primes, false_elites)
+    s.rows = len(labeled)
+
+# === Step 2: Single model update for the merged candidates ===
+enrichment.integrate_candidates(combined, labeled, full_retrain=args.full_retrain, novelty_index=novelty_index)
\ No newline at end of file